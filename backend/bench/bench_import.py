@@ -0,0 +1,115 @@
+"""Budget de temps d'import (démarrage à froid serverless).
+
+Importe you.py dans des processus Python neufs et compare le temps médian au
+budget. Vérifie aussi que les dépendances lourdes (yt-dlp, bs4, soupsieve, lxml)
+ne sont pas chargées par l'import : elles doivent l'être au premier usage.
+Affiche les modules les plus coûteux d'après python -X importtime.
+
+Code de sortie 1 si le budget est dépassé ou si un module lourd est importé :
+à lancer avant un déploiement pour détecter les régressions.
+
+Usage : python bench/bench_import.py [--runs 5] [--budget 800] [--top 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules qui ne doivent être importés qu'au premier usage
+LAZY_MODULES = ("yt_dlp", "bs4", "soupsieve", "lxml")
+
+# Budget par défaut (ms) pour `import you`, mesuré dans un processus neuf
+IMPORT_BUDGET_MS = float(os.environ.get("LYRICS_IMPORT_BUDGET", "800"))
+
+_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'ms': elapsed * 1000, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))\n"
+)
+
+
+def child_environment():
+    """Caches disque et état partagé désactivés : seul le coût de l'import est mesuré"""
+    env = dict(os.environ)
+    for name in ("LYRICS_CACHE_PATH", "LYRICS_INDEX_PATH", "LYRICS_STORE_PATH"):
+        env[name] = ""
+    env["LYRICS_WORKERS"] = "1"
+    env.setdefault("LYRICS_LOG_LEVEL", "ERROR")
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def measure_import(module, env):
+    """(durée en ms, modules lourds chargés) pour un import dans un processus neuf"""
+    code = _PROBE.format(module=module, lazy=LAZY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["ms"], result["loaded"]
+
+
+def slowest_imports(module, env, top):
+    """[(ms cumulées, module)] des imports directs de `module` les plus coûteux (-X importtime)"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # Profondeur 1 (deux espaces par niveau) : les sous-imports sont déjà dans le cumul
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            timings.append((int(cumulative) / 1000, name.strip()))
+    return sorted(timings, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="you", help="module à importer (you, main...)")
+    parser.add_argument("--runs", type=int, default=5, help="processus neufs mesurés")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_MS, help="budget en ms (médiane)")
+    parser.add_argument("--top", type=int, default=10, help="imports les plus coûteux affichés")
+    args = parser.parse_args()
+
+    env = child_environment()
+    # Premier import hors mesure : compile les .pyc comme lors d'un déploiement
+    measure_import(args.module, env)
+
+    timings, loaded = [], set()
+    for _ in range(args.runs):
+        elapsed, heavy = measure_import(args.module, env)
+        timings.append(elapsed)
+        loaded.update(heavy)
+    median = statistics.median(timings)
+
+    print(f"import {args.module} : médiane {median:.0f} ms sur {args.runs} processus "
+          f"(min {min(timings):.0f} ms, max {max(timings):.0f} ms), budget {args.budget:.0f} ms\n")
+    print(f"Imports directs de {args.module} les plus coûteux :")
+    for cumulative, name in slowest_imports(args.module, env, args.top):
+        print(f"  {cumulative:>8.1f} ms  {name}")
+
+    failed = False
+    if median > args.budget:
+        print(f"\n❌ Budget dépassé : {median:.0f} ms > {args.budget:.0f} ms")
+        failed = True
+    if loaded:
+        print(f"\n❌ Modules lourds importés au chargement : {', '.join(sorted(loaded))}")
+        failed = True
+    if not failed:
+        print(f"\n✅ Budget respecté, modules chargés au premier usage : {', '.join(LAZY_MODULES)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark de charge hors ligne.
+
+Envoie des requêtes concurrentes à /api/extract (application ASGI en mémoire, sans
+serveur) pendant que les fournisseurs sont simulés par bench/stub_server.py, puis
+mesure les fonctions unitaires (clean_title, parse_artist_and_title, parseurs
+Genius/AZLyrics/Musixmatch/Google) dans un pool de threads.
+
+Affiche le débit et les latences p50/p95/p99.
+
+Usage : python bench/bench_load.py [--requests 200] [--concurrency 20] [--latency 0.05]
+                                   [--forbidden musixmatch=0.3] [--rate-limited google=0.1]
+                                   [--timeouts "*=0.02"] [--missing ovh=0.5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+
+def configure_environment(args):
+    """Caches en mémoire seulement et limiteurs neutralisés, avant l'import de l'application"""
+    if not args.keep_cache:
+        for name in ("LYRICS_CACHE_PATH", "LYRICS_INDEX_PATH", "LYRICS_STORE_PATH"):
+            os.environ[name] = ""
+    if not args.rate_limits:
+        pools = ("ovh", "musixmatch", "azlyrics", "google", "genius", "youtube", "default")
+        os.environ["LYRICS_RATE_LIMITS"] = ",".join(f"{pool}=100000/100000" for pool in pools)
+    os.environ.setdefault("LYRICS_LOG_LEVEL", "ERROR")
+
+
+def percentile(sorted_values, fraction):
+    """Percentile par rang le plus proche d'une liste triée"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(fraction * len(sorted_values) + 0.5))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def report(name, latencies, elapsed, unit="req"):
+    latencies = sorted(latencies)
+    p50, p95, p99 = (percentile(latencies, p) * 1000 for p in (0.50, 0.95, 0.99))
+    print(f"{name:28} {len(latencies) / elapsed:>10,.1f} {unit}/s   "
+          f"p50 {p50:>8.2f} ms   p95 {p95:>8.2f} ms   p99 {p99:>8.2f} ms")
+
+
+async def run_load(app, requests, concurrency):
+    """Envoie `requests` extractions (une vidéo distincte chacune) avec `concurrency` clients"""
+    import httpx
+
+    latencies = []
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(index):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/extract", json={"youtube_url": f"https://www.youtube.com/watch?v=bench{index:06d}"}
+                )
+                latencies.append(time.perf_counter() - start)
+                status = response.json().get("status", response.status_code)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(requests)))
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed, statuses
+
+
+def run_functions(cases, threads, rounds):
+    """Mesure chaque fonction (appels répartis sur `threads` threads)"""
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for name, func, inputs in cases:
+            def timed_call(value, func=func):
+                start = time.perf_counter()
+                func(value)
+                return time.perf_counter() - start
+
+            work = inputs * rounds
+            start = time.perf_counter()
+            latencies = list(executor.map(timed_call, work))
+            report(name, latencies, time.perf_counter() - start, unit="appels")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="latence moyenne simulée (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="écart de latence simulée (s)")
+    parser.add_argument("--forbidden", default="", help="taux de 403 par pool, ex: musixmatch=0.3")
+    parser.add_argument("--rate-limited", default="", help="taux de 429 par pool, ex: google=0.1")
+    parser.add_argument("--timeouts", default="", help="taux de timeouts par pool, ex: *=0.02")
+    parser.add_argument("--timeout", type=float, default=1.0, help="durée d'un timeout simulé (s)")
+    parser.add_argument("--missing", default="", help="taux de pages introuvables par pool, ex: ovh=0.5")
+    parser.add_argument("--threads", type=int, default=4, help="threads pour les fonctions unitaires")
+    parser.add_argument("--rounds", type=int, default=20, help="tours sur les entrées des fonctions unitaires")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--keep-cache", action="store_true", help="utiliser les caches disque configurés")
+    parser.add_argument("--rate-limits", action="store_true", help="garder les limiteurs de débit par hôte")
+    args = parser.parse_args()
+
+    configure_environment(args)
+
+    import httpx
+    import http_pool
+    from bench_titles import load_corpus
+    from extraction import (extract_google_result_urls, parse_azlyrics_page, parse_genius_page,
+                            scrape_musixmatch_lyrics_from_response)
+    from stub_server import FixtureStub, load_fixture, parse_rates
+    from you import app, clean_title, parse_artist_and_title
+
+    stub = FixtureStub(
+        latency=args.latency, jitter=args.jitter,
+        forbidden=parse_rates(args.forbidden), rate_limited=parse_rates(args.rate_limited),
+        timeouts=parse_rates(args.timeouts), missing=parse_rates(args.missing),
+        timeout=args.timeout, seed=args.seed,
+    )
+    http_pool.set_transport(httpx.MockTransport(stub))
+
+    print(f"/api/extract : {args.requests} requêtes, concurrence {args.concurrency}, "
+          f"latence simulée {args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms\n")
+    latencies, elapsed, statuses = asyncio.run(run_load(app, args.requests, args.concurrency))
+    report("/api/extract", latencies, elapsed)
+    print(f"{'':28} statuts : {statuses}")
+    print(f"{'':28} réponses simulées : {stub.summary()}\n")
+
+    corpus = load_corpus()
+    cases = [
+        ("clean_title", clean_title, corpus),
+        ("parse_artist_and_title", lambda t: parse_artist_and_title(t, "uploader"), corpus),
+        ("parse_genius_page", parse_genius_page, [load_fixture("genius.html")]),
+        ("parse_azlyrics_page", parse_azlyrics_page, [load_fixture("azlyrics.html")]),
+        ("scrape_musixmatch", scrape_musixmatch_lyrics_from_response, [load_fixture("musixmatch.html")]),
+        ("extract_google_result_urls", extract_google_result_urls, [load_fixture("google_serp.html")]),
+    ]
+    print(f"Fonctions unitaires : {args.threads} threads, {args.rounds} tours\n")
+    run_functions(cases, args.threads, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Microbenchmark du normaliseur de titres.
+
+Compare clean_title / parse_artist_and_title (expressions précompilées, un seul
+passage) à l'ancienne implémentation (une substitution par mention parasite)
+sur un corpus de vrais titres YouTube.
+
+Usage : python bench/bench_titles.py [--rounds 200]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from you import clean_title, parse_artist_and_title  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "youtube_titles.txt")
+
+
+def legacy_clean_title(title):
+    """Ancienne version de clean_title (référence)"""
+    replacements = [
+        '(Official Music Video)', '(Official Video)', '(Music Video)',
+        '(Official)', '(Lyrics)', '[Official Video]', '[Music Video]',
+        '[Official]', '[Lyrics]', '| Official Video', '- Official Video',
+        '(Clip officiel)', '[Clip officiel]', '- Clip officiel',
+        '[Clip Officiel]', '(Clip Officiel)', 'prod by', 'prod. by',
+        'produced by', 'ft.', 'feat.', 'featuring',
+        '[One Take Video]', '(One Take Video)', '[One Take]', '(One Take)',
+        'Remix', 'Mix', 'Cover', 'Version'
+    ]
+    cleaned = title
+    for replacement in replacements:
+        cleaned = re.sub(re.escape(replacement), '', cleaned, flags=re.IGNORECASE).strip()
+    cleaned = re.sub(r'["\']', '', cleaned)
+    cleaned = re.sub(r'\[.*?\]', '', cleaned)
+    cleaned = re.sub(r'\(.*?\)', '', cleaned)
+    return re.sub(r'\s+', ' ', cleaned).strip()
+
+
+def legacy_parse_artist_and_title(youtube_title, uploader):
+    """Ancienne version de parse_artist_and_title (référence)"""
+    title = legacy_clean_title(youtube_title)
+    patterns = [
+        r'^(.+?)\s*,\s*(.+?)\s*[-–]\s*(.+)$',
+        r'^(.+?)\s*&\s*(.+?)\s*[-–]\s*(.+)$',
+        r'^(.+?)\s*[-–]\s*(.+)$',
+        r'^(.+?)\s*[\(\[]?ft\.?\s*(.+?)[\)\]]?\s*[-–]\s*(.+)$',
+    ]
+    for pattern in patterns:
+        match = re.match(pattern, title, re.IGNORECASE)
+        if match:
+            groups = match.groups()
+            if len(groups) == 3:
+                return f"{groups[0].strip()}, {groups[1].strip()}", groups[2].strip()
+            return groups[0].strip(), groups[1].strip()
+    return uploader, title
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def measure(func, corpus, rounds):
+    """Retourne le débit (titres/s) de func sur le corpus"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for title in corpus:
+            func(title)
+    return rounds * len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print(f"Corpus : {len(corpus)} titres, {args.rounds} tours\n")
+
+    cases = [
+        ("clean_title", legacy_clean_title, clean_title),
+        ("parse_artist_and_title",
+         lambda t: legacy_parse_artist_and_title(t, "uploader"),
+         lambda t: parse_artist_and_title(t, "uploader")),
+    ]
+    for name, legacy, current in cases:
+        legacy_rate = measure(legacy, corpus, args.rounds)
+        current_rate = measure(current, corpus, args.rounds)
+        print(f"{name:24} ancien {legacy_rate:>10,.0f} titres/s   "
+              f"nouveau {current_rate:>10,.0f} titres/s   x{current_rate / legacy_rate:.1f}")
+
+    differences = [(t, legacy_parse_artist_and_title(t, "uploader"), parse_artist_and_title(t, "uploader"))
+                   for t in corpus if legacy_parse_artist_and_title(t, "uploader") != parse_artist_and_title(t, "uploader")]
+    print(f"\nRésultats différents de l'ancienne version : {len(differences)}/{len(corpus)}")
+    for title, old, new in differences:
+        print(f"  {title!r}\n    ancien  {old}\n    nouveau {new}")
+
+
+if __name__ == "__main__":
+    main()
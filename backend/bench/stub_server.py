@@ -0,0 +1,126 @@
+"""Faux fournisseurs pour les benchmarks hors ligne.
+
+Rejoue les réponses enregistrées de bench/fixtures (oEmbed, Lyrics.ovh, Musixmatch,
+AZLyrics, Google, Genius) à la place du réseau, avec une latence et des taux
+d'erreur (403, 429, timeouts, pages introuvables) configurables par hôte.
+
+S'installe sous les pools HTTP : http_pool.set_transport(httpx.MockTransport(FixtureStub()))
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import urllib.parse
+from collections import Counter
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_pool import pool_name_for  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Fixture rejouée pour chaque pool (les autres hôtes répondent 404)
+FIXTURES = {
+    'ovh': ('ovh.json', 'application/json'),
+    'musixmatch': ('musixmatch.html', 'text/html; charset=utf-8'),
+    'azlyrics': ('azlyrics.html', 'text/html; charset=utf-8'),
+    'google': ('google_serp.html', 'text/html; charset=utf-8'),
+    'genius': ('genius.html', 'text/html; charset=utf-8'),
+}
+
+_VIDEO_ID_RE = re.compile(r'(?:v=|youtu\.be/)([\w-]{6,})')
+
+# Mots des titres générés : des titres trop proches seraient servis par l'index flou
+_WORDS = (
+    "amber", "blue", "broken", "city", "cold", "dance", "desert", "dream", "echo", "fever", "ghost", "gold",
+    "heart", "highway", "honey", "island", "jungle", "kiss", "lemon", "lights", "lonely", "lucky", "magic",
+    "midnight", "mirror", "moon", "neon", "ocean", "paper", "paradise", "petal", "queen", "rain", "rebel",
+    "river", "rocket", "rose", "runaway", "salt", "shadow", "silver", "smoke", "snow", "storm", "summer",
+    "sunset", "thunder", "tiger", "velvet", "violet", "wild", "window", "winter", "wolf", "yellow", "zero",
+)
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def parse_rates(spec):
+    """"ovh=0.5,google=0.1" -> {"ovh": 0.5, "google": 0.1} ("*" s'applique à tous les fournisseurs)"""
+    rates = {}
+    for item in filter(None, (spec or "").split(",")):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+class FixtureStub:
+    """Handler httpx.MockTransport qui rejoue les fixtures.
+
+    latency / jitter : délai moyen et écart (secondes) avant chaque réponse.
+    Les taux (dict pool -> probabilité, clé "*" par défaut) déclenchent une
+    réponse 403, une réponse 429 (avec Retry-After), un timeout après `timeout`
+    secondes, ou une page introuvable (404) pour forcer le passage au fournisseur suivant.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.02, forbidden=None, rate_limited=None, timeouts=None,
+                 missing=None, timeout=1.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.forbidden = forbidden or {}
+        self.rate_limited = rate_limited or {}
+        self.timeouts = timeouts or {}
+        self.missing = missing or {}
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.fixtures = {pool: (load_fixture(name).encode("utf-8"), content_type)
+                         for pool, (name, content_type) in FIXTURES.items()}
+        self.oembed = json.loads(load_fixture("oembed.json"))
+        self.stats = Counter()
+
+    def _draw(self, rates, pool):
+        # "*" ne vise que les fournisseurs : un échec oEmbed ferait appeler yt-dlp sur le vrai réseau
+        default = rates.get("*", 0.0) if pool != "youtube" else 0.0
+        return self.random.random() < rates.get(pool, default)
+
+    async def __call__(self, request):
+        pool = pool_name_for(str(request.url))
+        delay = max(0.0, self.random.gauss(self.latency, self.jitter)) if self.latency else 0.0
+
+        if self._draw(self.timeouts, pool):
+            self.stats[(pool, "timeout")] += 1
+            await asyncio.sleep(self.timeout)
+            raise httpx.ReadTimeout("stub timeout", request=request)
+        await asyncio.sleep(delay)
+
+        if self._draw(self.forbidden, pool):
+            return self._respond(pool, 403, b"Forbidden", "text/plain")
+        if self._draw(self.rate_limited, pool):
+            return self._respond(pool, 429, b"Too Many Requests", "text/plain", {"Retry-After": "1"})
+        if pool == "youtube":
+            return self._oembed(request)
+        if pool not in self.fixtures or self._draw(self.missing, pool):
+            return self._respond(pool, 404, b"Not Found", "text/plain")
+        body, content_type = self.fixtures[pool]
+        return self._respond(pool, 200, body, content_type)
+
+    def _oembed(self, request):
+        # Un titre distinct (et stable) par vidéo : chaque requête parcourt tout le pipeline
+        video_url = urllib.parse.unquote(request.url.params.get("url", ""))
+        match = _VIDEO_ID_RE.search(video_url)
+        words = random.Random(match.group(1) if match else "unknown").sample(_WORDS, 5)
+        artist, title = " ".join(words[:2]).title(), " ".join(words[2:]).title()
+        data = dict(self.oembed, title=f"{artist} - {title} (Official Video)")
+        return self._respond("youtube", 200, json.dumps(data).encode("utf-8"), "application/json")
+
+    def _respond(self, pool, status, body, content_type, headers=None):
+        self.stats[(pool, status)] += 1
+        return httpx.Response(status, content=body, headers=dict(headers or {}, **{"content-type": content_type}))
+
+    def summary(self):
+        """Réponses servies par (pool, statut)"""
+        return {f"{pool} {status}": total for (pool, status), total in sorted(self.stats.items(), key=str)}
@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import json
+import os
+
+from telemetry import count
+
+# Brotli est optionnel (pip install brotli) : sans lui, seul gzip est proposé
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Les réponses plus petites ne sont pas compressées (le gain ne couvre pas le coût)
+COMPRESS_MIN_SIZE = int(os.environ.get("LYRICS_COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.environ.get("LYRICS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("LYRICS_BROTLI_QUALITY", "5"))
+
+_COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/x-ndjson')
+
+
+def accepted_encodings(header):
+    """Encodages acceptés par le client d'après Accept-Encoding (q=0 exclu)"""
+    encodings = set()
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        if name and params.strip().replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(header):
+    encodings = accepted_encodings(header)
+    if brotli is not None and ('br' in encodings or '*' in encodings):
+        return 'br'
+    if 'gzip' in encodings or '*' in encodings:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Compression négociée (brotli, sinon gzip) des réponses complètes au-delà d'un seuil.
+
+    Les réponses en plusieurs morceaux (NDJSON/SSE en streaming) ne sont pas
+    compressées : chaque événement doit partir dès qu'il est prêt.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get('headers') or [])
+        encoding = choose_encoding(headers.get(b'accept-encoding', b'').decode('latin-1'))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+            if start is None or message['type'] != 'http.response.body':
+                return await send(message)
+            if message.get('more_body', False):
+                # Premier morceau d'une réponse en streaming : transmise telle quelle
+                await send(start)
+            else:
+                start, message = self._encode(start, message, encoding)
+                await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def _encode(self, start, message, encoding):
+        """(en-têtes, corps) de la réponse, compressés si elle est assez grosse et compressible"""
+        body = message.get('body', b'')
+        headers = list(start.get('headers', []))
+        content_type = dict(headers).get(b'content-type', b'').decode('latin-1')
+        if (len(body) < self.minimum_size
+                or any(name.lower() == b'content-encoding' for name, _ in headers)
+                or not content_type.startswith(_COMPRESSIBLE_TYPES)):
+            return start, message
+        compressed = compress(body, encoding)
+        count("compressed_response", encoding=encoding)
+        headers = [(name, value) for name, value in headers if name.lower() != b'content-length']
+        headers += [
+            (b'content-encoding', encoding.encode('latin-1')),
+            (b'content-length', str(len(compressed)).encode('latin-1')),
+            (b'vary', b'Accept-Encoding'),
+        ]
+        return dict(start, headers=headers), dict(message, body=compressed)
+
+
+# --- Mode compact et ETag ------------------------------------------------------
+
+def compact_lyrics(lyrics):
+    """Paroles en blocs (strophes) uniques et ordre des blocs : un refrain répété n'est envoyé qu'une fois.
+
+    Reconstruction côté client : "\n\n".join(blocks[i] for i in layout)
+    """
+    blocks, layout, positions = [], [], {}
+    for block in lyrics.split('\n\n'):
+        position = positions.get(block)
+        if position is None:
+            position = positions[block] = len(blocks)
+            blocks.append(block)
+        layout.append(position)
+    return {'blocks': blocks, 'layout': layout}
+
+
+def expand_lyrics(compact):
+    return '\n\n'.join(compact['blocks'][position] for position in compact['layout'])
+
+
+def payload_etag(payload):
+    """ETag fort d'une réponse JSON (empreinte de son contenu)"""
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+def etag_matches(etag, if_none_match):
+    """Vrai si l'en-tête If-None-Match du client désigne déjà cette version"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags
@@ -0,0 +1,224 @@
+import functools
+import importlib.util
+import json
+import os
+import re
+import urllib.parse
+from types import SimpleNamespace
+
+from telemetry import get_logger
+
+logger = get_logger("extraction")
+
+# Parseur HTML : lxml (C) s'il est installé, sinon le parseur pur Python.
+# find_spec ne charge pas lxml : il ne l'est qu'au premier parsing.
+_DEFAULT_PARSER = 'lxml' if importlib.util.find_spec('lxml') is not None else 'html.parser'
+
+HTML_PARSER = os.environ.get("LYRICS_HTML_PARSER", _DEFAULT_PARSER)
+
+
+@functools.cache
+def soup_tools():
+    """BeautifulSoup, filtres et sélecteurs CSS compilés, construits au premier parsing.
+
+    bs4 et soupsieve ne sont pas importés avec le module : un démarrage à froid
+    (serverless, CLI) qui ne parse aucune page ne les paie pas.
+    """
+    import soupsieve
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    def compile_all(selectors):
+        return [soupsieve.compile(selector) for selector in selectors]
+
+    return SimpleNamespace(
+        BeautifulSoup=BeautifulSoup,
+        genius_strainer=SoupStrainer('div', attrs={'data-lyrics-container': 'true'}),
+        genius_selectors=compile_all(_GENIUS_SELECTORS),
+        azlyrics_selectors=compile_all(_AZLYRICS_SELECTORS),
+        musixmatch_strainer=SoupStrainer(attrs={'class': re.compile('lyrics')}),
+        musixmatch_selectors=compile_all(_MUSIXMATCH_SELECTORS),
+    )
+
+
+def _slice_from_tag(html_content, markers):
+    """Retourne le HTML à partir de la balise contenant le premier marqueur trouvé (ou None)"""
+    positions = [pos for pos in (html_content.find(marker) for marker in markers) if pos != -1]
+    if not positions:
+        return None
+    return html_content[html_content.rfind('<', 0, min(positions)):]
+
+
+# --- Genius -----------------------------------------------------------------
+
+_GENIUS_MARKERS = ('data-lyrics-container', 'Lyrics__Container')
+_GENIUS_SELECTORS = (
+    'div[class*="Lyrics__Container"]',
+    'div[data-lyrics-container="true"]',
+    'div[class*="lyrics"]'
+)
+
+
+def _join_genius_containers(containers):
+    lyrics_text = []
+    for container in containers:
+        # Extraire le texte en préservant les sauts de ligne
+        for br in container.find_all('br'):
+            br.replace_with('\n')
+        lyrics_text.append(container.get_text())
+    combined_lyrics = '\n'.join(lyrics_text).strip()
+    return combined_lyrics if len(combined_lyrics) > 50 else None
+
+
+def parse_genius_page(html_content):
+    """Extrait les paroles d'une page Genius"""
+    tools = soup_tools()
+    # Chemin rapide : on ne construit que les conteneurs de paroles
+    region = _slice_from_tag(html_content, _GENIUS_MARKERS)
+    if region is not None:
+        soup = tools.BeautifulSoup(region, HTML_PARSER, parse_only=tools.genius_strainer)
+        containers = soup.find_all('div', attrs={'data-lyrics-container': 'true'})
+        if containers:
+            lyrics = _join_genius_containers(containers)
+            if lyrics:
+                return lyrics
+
+    # Ancienne mise en page : arbre complet et sélecteurs génériques
+    soup = tools.BeautifulSoup(html_content, HTML_PARSER)
+    for selector in tools.genius_selectors:
+        lyrics_containers = selector.select(soup)
+        if lyrics_containers:
+            lyrics = _join_genius_containers(lyrics_containers)
+            if lyrics:
+                return lyrics
+
+    return None
+
+
+# --- AZLyrics ---------------------------------------------------------------
+
+# Les paroles AZLyrics suivent toujours ce commentaire, dans une div sans classe
+_AZLYRICS_MARKER = '<!-- Usage of azlyrics.com content'
+_AZLYRICS_MAIN_COLUMN = '<div class="col-xs-12 col-lg-8 text-center">'
+_AZLYRICS_SELECTORS = (
+    'div:not([class]):not([id])',  # Main lyrics div without class/id
+    'div[class=""]',               # Empty class div
+    'div.col-xs-12.col-lg-8.text-center div:not([class]):not([id])',
+    'div.ringtone + div:not([class]):not([id])'
+)
+
+
+def _looks_like_azlyrics(lyrics_text):
+    # Check if this looks like actual lyrics (reasonable length, not navigation)
+    return (len(lyrics_text) > 100 and
+            'Submit Corrections' not in lyrics_text and
+            'Thanks to' not in lyrics_text[:50] and
+            'Sorry' not in lyrics_text[:20])
+
+
+def parse_azlyrics_page(html_content):
+    """Extrait les paroles d'une page AZLyrics"""
+    tools = soup_tools()
+    # Chemin rapide : seul le bloc entre le commentaire de licence et la fin de la div est parsé
+    start = html_content.find(_AZLYRICS_MARKER)
+    if start != -1:
+        end = html_content.find('</div>', start)
+        if end != -1:
+            lyrics_text = tools.BeautifulSoup(html_content[start:end], HTML_PARSER).get_text().strip()
+            if _looks_like_azlyrics(lyrics_text):
+                return lyrics_text
+
+    # Sinon, on se limite à la colonne principale quand elle existe
+    main_column = html_content.find(_AZLYRICS_MAIN_COLUMN)
+    soup = tools.BeautifulSoup(html_content[main_column:] if main_column != -1 else html_content, HTML_PARSER)
+    for selector in tools.azlyrics_selectors:
+        for lyrics_div in selector.select(soup):
+            lyrics_text = lyrics_div.get_text().strip()
+            if lyrics_text and _looks_like_azlyrics(lyrics_text):
+                return lyrics_text
+
+    return None
+
+
+# --- Musixmatch -------------------------------------------------------------
+
+_MUSIXMATCH_SELECTORS = (
+    'p[class*="lyrics__content"]',
+    'span[class*="lyrics__content"]',
+    'div[class*="lyrics"]',
+    'p[data-test="lyrics-text"]',
+    'div[class*="mxm-lyrics"]',
+    'span[class*="lyrics__content__ok"]'
+)
+
+
+def _select_musixmatch(soup):
+    for selector in soup_tools().musixmatch_selectors:
+        lyrics_elements = selector.select(soup)
+        if lyrics_elements:
+            lyrics = '\n'.join([elem.get_text().strip() for elem in lyrics_elements])
+            if lyrics and len(lyrics) > 50:  # Vérifier que ce sont de vraies paroles
+                return lyrics
+    return None
+
+
+def scrape_musixmatch_lyrics_from_response(html_content):
+    """Scrape les paroles depuis le contenu HTML de Musixmatch"""
+    try:
+        tools = soup_tools()
+        # Chemin rapide : seuls les éléments dont la classe contient "lyrics" sont construits
+        lyrics = _select_musixmatch(tools.BeautifulSoup(html_content, HTML_PARSER, parse_only=tools.musixmatch_strainer))
+        if lyrics:
+            return lyrics
+
+        soup = tools.BeautifulSoup(html_content, HTML_PARSER)
+        lyrics = _select_musixmatch(soup)
+        if lyrics:
+            return lyrics
+
+        # Try alternative approach - look for JSON-LD data
+        scripts = soup.find_all('script', type='application/ld+json')
+        for script in scripts:
+            try:
+                data = json.loads(script.string)
+                if 'lyrics' in data:
+                    return data['lyrics']
+            except:
+                continue
+
+        logger.info("❌ Structure de paroles Musixmatch non reconnue")
+    except Exception as e:
+        logger.warning(f"⚠️ Erreur scraping Musixmatch: {e}")
+
+    return None
+
+
+# --- Google -----------------------------------------------------------------
+
+# Un seul passage sur le HTML brut : liens de résultat (redirection /url?q= ou directs)
+_GOOGLE_LINK_RE = re.compile(r'href="(?:/url\?q=)?(https?(?::|%3A)[^"&]+)', re.IGNORECASE)
+
+# Sites de paroles que l'on sait scraper, reconnus d'après l'URL
+_LYRICS_SITE_RE = re.compile(
+    r'^https?://(?:www\.)?(?:'
+    r'(?P<genius>genius\.com/[^/?#]+-lyrics)|'
+    r'(?P<azlyrics>azlyrics\.com/lyrics/)|'
+    r'(?P<musixmatch>musixmatch\.com/lyrics/)'
+    r')',
+    re.IGNORECASE
+)
+
+
+def extract_google_result_urls(html_content):
+    """Extrait d'une page de résultats Google les liens vers des sites de paroles connus.
+
+    Retourne une liste de (site, url) dans l'ordre des résultats, sans doublons.
+    """
+    candidates = []
+    seen = set()
+    for match in _GOOGLE_LINK_RE.finditer(html_content):
+        url = urllib.parse.unquote(match.group(1))
+        site = _LYRICS_SITE_RE.match(url)
+        if site and url not in seen:
+            seen.add(url)
+            candidates.append((site.lastgroup, url))
+    return candidates
@@ -0,0 +1,120 @@
+import base64
+import os
+import re
+import time
+import zlib
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from lyrics_cache import MISSING, TwoLevelCache, _store
+from telemetry import count
+
+# Pools dont les réponses GET sont mises en cache (pages de paroles scrapées)
+HTTP_CACHE_POOLS = {
+    name.strip() for name in os.environ.get("LYRICS_HTTP_CACHE_POOLS", "genius,azlyrics,musixmatch").split(",")
+    if name.strip()
+}
+# Durée de conservation d'une page pour la revalider (au-delà de sa fraîcheur)
+HTTP_CACHE_TTL = float(os.environ.get("LYRICS_HTTP_CACHE_TTL", str(7 * 24 * 3600)))
+# Fraîcheur par défaut quand le serveur ne donne ni Cache-Control ni Expires
+DEFAULT_FRESHNESS = float(os.environ.get("LYRICS_HTTP_DEFAULT_FRESHNESS", "3600"))
+# Cache négatif des URL en 404 (slugs AZLyrics devinés, etc.)
+NOT_FOUND_TTL = float(os.environ.get("LYRICS_HTTP_404_TTL", str(24 * 3600)))
+# Les pages plus grosses ne sont pas conservées
+MAX_BODY = int(os.environ.get("LYRICS_HTTP_CACHE_MAX_BODY", str(2 * 1024 * 1024)))
+
+_MAX_AGE_RE = re.compile(r'(?:s-maxage|max-age)\s*=\s*(\d+)', re.IGNORECASE)
+_KEPT_HEADERS = ('content-type', 'etag', 'last-modified', 'cache-control')
+
+
+def freshness(headers, now):
+    """Date d'expiration de la fraîcheur d'une réponse (None si elle ne doit pas être stockée)"""
+    cache_control = headers.get('cache-control', '').lower()
+    if 'no-store' in cache_control or 'private' in cache_control:
+        return None
+    if 'no-cache' in cache_control:
+        return now
+    max_age = _MAX_AGE_RE.search(cache_control)
+    if max_age:
+        return now + int(max_age.group(1))
+    if headers.get('expires'):
+        try:
+            return parsedate_to_datetime(headers['expires']).timestamp()
+        except (TypeError, ValueError):
+            return now
+    return now + DEFAULT_FRESHNESS
+
+
+def _pack(content):
+    return base64.b64encode(zlib.compress(content)).decode('ascii')
+
+
+def _unpack(body):
+    return zlib.decompress(base64.b64decode(body))
+
+
+class HttpCache:
+    """Cache HTTP sous les pools : respecte Cache-Control, revalide avec ETag/Last-Modified
+    (réponses 304) et mémorise les 404."""
+
+    def __init__(self, store):
+        self.entries = TwoLevelCache("http", store, maxsize=int(os.environ.get("LYRICS_HTTP_LRU_SIZE", "256")))
+        self.stats = defaultdict(lambda: {'hits': 0, 'revalidated': 0, 'misses': 0, 'not_found_hits': 0})
+
+    async def get(self, pool_name, url, send):
+        """GET `url` via le cache ; `send(headers)` effectue la requête réseau"""
+        stats = self.stats[pool_name]
+        now = time.time()
+        entry = self.entries.get(url)
+
+        if entry is not MISSING and entry['status'] == 404:
+            stats['not_found_hits'] += 1
+            return self._response(url, entry, 'not_found')
+        if entry is not MISSING and entry['fresh_until'] > now:
+            stats['hits'] += 1
+            return self._response(url, entry, 'hit')
+
+        conditional = {}
+        if entry is not MISSING:
+            if entry['headers'].get('etag'):
+                conditional['If-None-Match'] = entry['headers']['etag']
+            if entry['headers'].get('last-modified'):
+                conditional['If-Modified-Since'] = entry['headers']['last-modified']
+
+        response = await send(conditional)
+
+        if response.status_code == 304 and entry is not MISSING:
+            stats['revalidated'] += 1
+            headers = dict(entry['headers'], **{k: v for k, v in response.headers.items() if k in _KEPT_HEADERS})
+            entry = dict(entry, headers=headers, fresh_until=freshness(response.headers, now) or now)
+            self.entries.set(url, entry, HTTP_CACHE_TTL)
+            return self._response(url, entry, 'revalidated')
+
+        stats['misses'] += 1
+        if response.status_code == 404:
+            self.entries.set(url, {'status': 404, 'headers': {}, 'body': '', 'fresh_until': now + NOT_FOUND_TTL}, NOT_FOUND_TTL)
+        elif response.status_code == 200 and len(response.content) <= MAX_BODY:
+            fresh_until = freshness(response.headers, now)
+            if fresh_until is not None:
+                self.entries.set(url, {
+                    'status': 200,
+                    'headers': {k: v for k, v in response.headers.items() if k in _KEPT_HEADERS},
+                    'body': _pack(response.content),
+                    'fresh_until': fresh_until,
+                }, HTTP_CACHE_TTL)
+        return response
+
+    @staticmethod
+    def _response(url, entry, state):
+        count("cache", cache="http", result=state)
+        headers = dict(entry['headers'], **{'x-lyrics-cache': state})
+        content = _unpack(entry['body']) if entry['body'] else b''
+        return httpx.Response(entry['status'], headers=headers, content=content, request=httpx.Request('GET', url))
+
+    def snapshot(self, pool_name):
+        return dict(self.stats[pool_name]) if pool_name in self.stats else None
+
+
+http_cache = HttpCache(_store)
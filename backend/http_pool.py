@@ -0,0 +1,289 @@
+import asyncio
+import contextvars
+import os
+import time
+import urllib.parse
+from contextlib import contextmanager
+
+import httpx
+
+from http_cache import HTTP_CACHE_POOLS, http_cache
+from provider_health import CircuitOpenError, get_breaker
+from rate_limit import get_limiter, parse_retry_after
+from shared_state import run_shared, submit_shared
+from telemetry import timed, count
+
+_CHROME_UA = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+
+# En-têtes envoyés à chaque hôte fournisseur (définis une seule fois)
+PROVIDER_HEADERS = {
+    'ovh': {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'application/json, text/plain, */*',
+        'Accept-Language': 'en-US,en;q=0.9,fr;q=0.8',
+        'Referer': 'https://lyrics.ovh/'
+    },
+    'musixmatch': {
+        'User-Agent': _CHROME_UA,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'DNT': '1',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Ch-Ua': '"Chromium";v="122", "Not(A:Brand";v="24", "Google Chrome";v="122"',
+        'Sec-Ch-Ua-Mobile': '?0',
+        'Sec-Ch-Ua-Platform': '"Windows"',
+        'Cache-Control': 'max-age=0'
+    },
+    'azlyrics': {
+        'User-Agent': _CHROME_UA,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Referer': 'https://www.google.com/',
+        'DNT': '1',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'cross-site',
+        'Cache-Control': 'max-age=0'
+    },
+    'google': {
+        'User-Agent': _CHROME_UA,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'DNT': '1',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none'
+    },
+    'genius': {
+        'User-Agent': _CHROME_UA,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9'
+    },
+    'youtube': {
+        'User-Agent': _CHROME_UA,
+        'Accept': 'application/json, text/plain, */*'
+    },
+    'default': {
+        'User-Agent': _CHROME_UA
+    },
+}
+
+# Hôte -> pool de connexions
+HOST_POOLS = {
+    'api.lyrics.ovh': 'ovh',
+    'musixmatch.com': 'musixmatch',
+    'azlyrics.com': 'azlyrics',
+    'google.com': 'google',
+    'genius.com': 'genius',
+    'youtube.com': 'youtube',
+}
+
+# Taille maximale de chaque pool (connexions simultanées vers l'hôte)
+POOL_SIZES = {
+    'ovh': 10,
+    'musixmatch': 4,
+    'azlyrics': 4,
+    'google': 4,
+    'genius': 8,
+    'youtube': 10,
+    'default': 8,
+}
+
+KEEPALIVE_EXPIRY = float(os.environ.get("LYRICS_POOL_KEEPALIVE", "60"))
+
+# Transport utilisé par tous les pools (None = réseau ; remplaçable pour les benchmarks)
+_transport = None
+
+# Échéance de la tentative en cours (time.monotonic()) : les requêtes HTTP ne la dépassent pas
+_http_deadline = contextvars.ContextVar("lyrics_http_deadline", default=None)
+# Marge de l'horloge asyncio : une annulation aussi proche de l'échéance est un timeout
+_DEADLINE_SLACK = 0.05
+
+
+@contextmanager
+def http_deadline(seconds):
+    """Borne les requêtes HTTP du contexte courant à `seconds` (timeout d'une tentative)"""
+    token = _http_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _http_deadline.reset(token)
+
+
+def _deadline_exceeded():
+    deadline = _http_deadline.get()
+    return deadline is not None and time.monotonic() >= deadline - _DEADLINE_SLACK
+
+
+class HostPool:
+    """Client HTTP keep-alive dédié à un hôte : taille bornée, limiteur de débit,
+    disjoncteur et statistiques"""
+
+    def __init__(self, name, headers, max_connections):
+        self.name = name
+        self.headers = headers
+        self.max_connections = max_connections
+        self.client = None
+        self.limiter = get_limiter(name)
+        self.breaker = get_breaker(name)
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self.stats = {
+            'requests': 0,
+            'hits': 0,
+            'new_connections': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'in_flight': 0,
+            'errors': 0,
+        }
+
+    def _get_client(self):
+        if self.client is None or self.client.is_closed:
+            self.client = httpx.AsyncClient(
+                headers=self.headers,
+                follow_redirects=True,
+                timeout=20,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=KEEPALIVE_EXPIRY
+                ),
+                transport=_transport
+            )
+        return self.client
+
+    async def request(self, method, url, **kwargs):
+        if not await run_shared(self.breaker.allow):
+            raise CircuitOpenError(f"Disjoncteur ouvert pour l'hôte {self.name}")
+
+        deadline = _http_deadline.get()
+        if deadline is not None:
+            # Le timeout HTTP suit celui de la tentative : un hôte muet lève un timeout httpx
+            remaining = max(deadline - time.monotonic(), 0.001)
+            kwargs['timeout'] = min(kwargs.get('timeout') or remaining, remaining)
+
+        # "queued" (limiteur, pool), "dispatched" (requête partie vers l'hôte), puis "answered"
+        progress = {'stage': 'queued'}
+        try:
+            response = await self._send(method, url, progress, **kwargs)
+        except httpx.TransportError:
+            await run_shared(self.breaker.record_failure)
+            raise
+        except BaseException:
+            # Annulée à l'échéance de la tentative alors que l'hôte avait la requête : il n'a pas
+            # répondu à temps. Encore en file (notre propre limiteur), l'hôte n'y est pour rien
+            timed_out = progress['stage'] == 'dispatched' and _deadline_exceeded()
+            submit_shared(self.breaker.record_failure if timed_out else self.breaker.release)
+            raise
+
+        if response.status_code in (403, 429) or response.status_code >= 500:
+            await run_shared(self.breaker.record_failure)
+        else:
+            await run_shared(self.breaker.record_success)
+        return response
+
+    async def _send(self, method, url, progress, **kwargs):
+        await self.limiter.acquire()
+
+        if self._semaphore.locked():
+            self.stats['waits'] += 1
+        wait_start = time.monotonic()
+
+        async with self._semaphore:
+            self.stats['wait_time'] += time.monotonic() - wait_start
+            self.stats['requests'] += 1
+            self.stats['in_flight'] += 1
+
+            opened = False
+
+            async def trace(event_name, info):
+                nonlocal opened
+                if event_name == 'connection.connect_tcp.started':
+                    opened = True
+
+            extensions = dict(kwargs.pop('extensions', None) or {}, trace=trace)
+            try:
+                with timed("http", pool=self.name):
+                    progress['stage'] = 'dispatched'
+                    response = await self._get_client().request(method, url, extensions=extensions, **kwargs)
+                    progress['stage'] = 'answered'
+            except httpx.HTTPError as e:
+                self.stats['errors'] += 1
+                count("http_response", pool=self.name, status=type(e).__name__)
+                raise
+            finally:
+                self.stats['in_flight'] -= 1
+                self.stats['new_connections' if opened else 'hits'] += 1
+
+        count("http_response", pool=self.name, status=response.status_code)
+        if response.status_code in (403, 429):
+            await run_shared(self.limiter.penalize, parse_retry_after(response.headers.get('Retry-After')))
+        else:
+            await run_shared(self.limiter.reward)
+        return response
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+_pools = {}
+
+
+def pool_name_for(url):
+    """Nom du pool à utiliser pour une URL"""
+    host = urllib.parse.urlsplit(url).hostname or ''
+    for suffix, name in HOST_POOLS.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return name
+    return 'default'
+
+
+def get_pool(name):
+    """Retourne (en le créant si besoin) le pool partagé `name`"""
+    pool = _pools.get(name)
+    if pool is None:
+        pool = _pools[name] = HostPool(name, PROVIDER_HEADERS.get(name, PROVIDER_HEADERS['default']), POOL_SIZES.get(name, POOL_SIZES['default']))
+    return pool
+
+
+async def http_get(url, **kwargs):
+    """GET via le pool de l'hôte de l'URL (et le cache HTTP pour les pages de paroles)"""
+    pool = get_pool(pool_name_for(url))
+    if pool.name not in HTTP_CACHE_POOLS:
+        return await pool.request('GET', url, **kwargs)
+
+    async def send(conditional):
+        headers = dict(kwargs.get('headers') or {}, **conditional)
+        return await pool.request('GET', url, **dict(kwargs, headers=headers))
+
+    return await http_cache.get(pool.name, url, send)
+
+
+def pool_stats():
+    """Statistiques de chaque pool (pour dimensionner les pools en charge)"""
+    return {
+        name: dict(pool.stats, max_connections=pool.max_connections, rate_limit=pool.limiter.snapshot(),
+                   http_cache=http_cache.snapshot(name))
+        for name, pool in _pools.items()
+    }
+
+
+def set_transport(transport):
+    """Remplace le transport HTTP de tous les pools (benchmarks, rejeu de fixtures)"""
+    global _transport
+    _transport = transport
+    for pool in _pools.values():
+        pool.client = None
+
+
+async def close_pools():
+    """Ferme toutes les connexions ouvertes"""
+    for pool in _pools.values():
+        await pool.aclose()
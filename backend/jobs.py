@@ -0,0 +1,148 @@
+import asyncio
+import contextvars
+import itertools
+import os
+import time
+import uuid
+
+from shared_state import run_shared, shared_state
+from telemetry import get_logger
+
+logger = get_logger("jobs")
+
+JOB_WORKERS = int(os.environ.get("LYRICS_JOB_WORKERS", "4"))
+# Au-delà, les nouvelles soumissions sont refusées (contre-pression)
+JOB_QUEUE_SIZE = int(os.environ.get("LYRICS_JOB_QUEUE_SIZE", "1000"))
+# Durée de conservation des jobs terminés
+JOB_TTL = float(os.environ.get("LYRICS_JOB_TTL", "3600"))
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class QueueFullError(Exception):
+    """La file de jobs est pleine"""
+
+
+class Job:
+    def __init__(self, payload, priority, sequence):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.priority = priority
+        self.key = (priority, sequence)
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        result = self.result.model_dump() if hasattr(self.result, 'model_dump') else self.result
+        return {
+            'id': self.id, 'payload': self.payload, 'priority': self.priority, 'status': self.status,
+            'result': result, 'error': self.error, 'created_at': self.created_at,
+            'started_at': self.started_at, 'finished_at': self.finished_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Job suivi par un autre worker (lecture seule)"""
+        job = cls.__new__(cls)
+        job.__dict__.update(data)
+        job.key = (job.priority, 0)
+        return job
+
+
+class JobQueue:
+    """File de jobs en mémoire avec priorités (0 = plus urgent) et pool de workers asyncio.
+
+    `runner` est une coroutine qui reçoit le payload d'un job et retourne son résultat.
+    En mode multi-processus, l'état des jobs est publié dans l'état partagé pour
+    que n'importe quel worker puisse répondre à une demande de statut.
+    """
+
+    def __init__(self, runner, workers=JOB_WORKERS, maxsize=JOB_QUEUE_SIZE):
+        self.runner = runner
+        self.workers = workers
+        self.maxsize = maxsize
+        self.jobs = {}
+        self._queue = None
+        self._tasks = []
+        self._counter = itertools.count()
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue(self.maxsize)
+        self._tasks = [task for task in self._tasks if not task.done()]
+        for _ in range(self.workers - len(self._tasks)):
+            # Contexte vierge : un worker démarré pendant une requête n'hérite pas de sa trace
+            self._tasks.append(asyncio.create_task(self._worker(), context=contextvars.Context()))
+
+    async def submit(self, payload, priority=5):
+        """Met un job en file et retourne sans attendre son exécution ; lève QueueFullError si la file est pleine"""
+        self._ensure_workers()
+        self._purge()
+        if self._queue.full():
+            raise QueueFullError(f"File de jobs pleine ({self.maxsize})")
+        # Le compteur garde l'ordre d'arrivée entre jobs de même priorité
+        job = Job(payload, priority, next(self._counter))
+        # Publié avant la mise en file : l'état "queued" ne peut pas écraser celui du worker
+        await self._publish(job)
+        try:
+            self._queue.put_nowait((job.key, job))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"File de jobs pleine ({self.maxsize})")
+        self.jobs[job.id] = job
+        return job
+
+    async def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None and shared_state is not None:
+            data = await run_shared(shared_state.get, 'job', job_id)
+            job = Job.from_dict(data) if data is not None else None
+        return job
+
+    async def _publish(self, job):
+        if shared_state is not None:
+            await run_shared(shared_state.put, 'job', job.id, job.to_dict(), JOB_TTL)
+
+    def position(self, job):
+        """Nombre de jobs en file qui passeront avant celui-ci (dans la file de ce worker)"""
+        if job.status != QUEUED or job.id not in self.jobs:
+            return 0
+        return sum(1 for other in self.jobs.values() if other.status == QUEUED and other.key < job.key)
+
+    async def _worker(self):
+        while True:
+            _, job = await self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            await self._publish(job)
+            try:
+                job.result = await self.runner(job.payload)
+                job.status = DONE
+            except Exception as e:
+                logger.warning(f"⚠️ Job {job.id} en échec: {e}")
+                job.error = str(e)
+                job.status = FAILED
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+                await self._publish(job)
+
+    def _purge(self):
+        expired = time.time() - JOB_TTL
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished_at and job.finished_at < expired]:
+            del self.jobs[job_id]
+
+    def stats(self):
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return dict(counts, workers=self.workers, capacity=self.maxsize)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,292 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from telemetry import get_logger
+
+logger = get_logger("lyrics_cache")
+
+# Valeur retournée quand une clé n'est pas en cache (None est une valeur valide :
+# c'est ainsi qu'on mémorise un résultat négatif)
+MISSING = object()
+
+CACHE_PATH = os.environ.get("LYRICS_CACHE_PATH", os.path.join(tempfile.gettempdir(), "lyricsnap_cache.sqlite3"))
+CACHE_MAX_ENTRIES = int(os.environ.get("LYRICS_CACHE_MAX_ENTRIES", "100000"))
+
+VIDEO_TTL = float(os.environ.get("LYRICS_VIDEO_TTL", str(7 * 24 * 3600)))
+LYRICS_TTL = float(os.environ.get("LYRICS_LYRICS_TTL", str(30 * 24 * 3600)))
+NEGATIVE_TTL = float(os.environ.get("LYRICS_NEGATIVE_TTL", str(6 * 3600)))
+SERP_TTL = float(os.environ.get("LYRICS_SERP_TTL", str(24 * 3600)))
+# Au-delà de leur TTL, paroles et métadonnées restent servies ce temps-là pendant leur rafraîchissement
+STALE_TTL = float(os.environ.get("LYRICS_STALE_TTL", str(7 * 24 * 3600)))
+
+# Lignes lues par requête lors d'un parcours complet (values) : le verrou est rendu entre deux pages
+_SCAN_PAGE = 1000
+
+_YOUTUBE_ID_RE = re.compile(r'(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})')
+
+
+def extract_video_id(youtube_url):
+    """Extrait l'identifiant de la vidéo d'une URL YouTube (ou retourne l'URL)"""
+    match = _YOUTUBE_ID_RE.search(youtube_url)
+    return match.group(1) if match else youtube_url.strip()
+
+
+def normalize_key(artist, title):
+    """Forme normalisée d'un couple (artiste, titre) utilisée comme clé de cache"""
+    def normalize(text):
+        text = unicodedata.normalize('NFKD', text or '')
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+        text = re.sub(r'[^\w\s]', ' ', text.casefold())
+        return re.sub(r'\s+', ' ', text).strip()
+    return f"{normalize(artist)}|{normalize(title)}"
+
+
+class LRUCache:
+    """Cache mémoire LRU avec expiration par entrée"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def values(self):
+        """Valeurs non expirées"""
+        now = time.time()
+        with self._lock:
+            return [value for value, expires_at in self._data.values() if expires_at >= now]
+
+
+class SQLiteStore:
+    """Stockage disque (SQLite) avec TTL et éviction des entrées les moins utilisées.
+
+    Les lectures passent par une connexion dédiée (en WAL, une lecture n'attend jamais
+    un écrivain). Les écritures sont faites dans l'ordre par un thread unique : la boucle
+    asyncio n'attend pas le verrou d'écriture qu'un autre processus peut tenir. Les
+    écritures encore en file restent visibles des lectures de ce processus.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writes = 0
+        # (namespace, clé) -> (JSON ou None si supprimée, expiration) pas encore écrit
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="cache-writer")
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (namespace, accessed_at)")
+        self._reader = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+    def get(self, namespace, key):
+        now = time.time()
+        with self._pending_lock:
+            pending = self._pending.get((namespace, key))
+        if pending is not None:
+            value, expires_at = pending
+        else:
+            with self._read_lock:
+                row = self._reader.execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                    (namespace, key)
+                ).fetchone()
+            if row is None:
+                return MISSING, 0
+            value, expires_at = row
+            if expires_at >= now:
+                self._submit(self._touch, namespace, key, now)
+        if value is None or expires_at < now:
+            return MISSING, 0
+        return json.loads(value), expires_at - now
+
+    def set(self, namespace, key, value, ttl):
+        now = time.time()
+        self._enqueue(namespace, key, (json.dumps(value), now + ttl), now)
+
+    def delete(self, namespace, key):
+        self._enqueue(namespace, key, (None, time.time()), None)
+
+    def values(self, namespace):
+        """Valeurs non expirées d'un espace de noms (écritures en file non comprises)"""
+        now = time.time()
+        values, last = [], ''
+        while True:
+            with self._read_lock:
+                rows = self._reader.execute(
+                    "SELECT key, value, expires_at FROM cache WHERE namespace = ? AND key > ? ORDER BY key LIMIT ?",
+                    (namespace, last, _SCAN_PAGE)
+                ).fetchall()
+            if not rows:
+                return values
+            last = rows[-1][0]
+            values.extend(json.loads(value) for _, value, expires_at in rows if expires_at >= now)
+
+    def flush(self):
+        """Attend que les écritures en file soient faites"""
+        self._writer.submit(lambda: None).result()
+
+    def _enqueue(self, namespace, key, entry, now):
+        with self._pending_lock:
+            self._pending[(namespace, key)] = entry
+        self._submit(self._write, namespace, key, entry, now)
+
+    def _submit(self, func, *args):
+        self._writer.submit(self._run, func, *args)
+
+    def _run(self, func, *args):
+        try:
+            with self._lock:
+                func(*args)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Écriture du cache disque en échec: {e}")
+
+    def _write(self, namespace, key, entry, now):
+        try:
+            value, expires_at = entry
+            if value is None:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, value, expires_at, now)
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._evict(namespace, now)
+        finally:
+            with self._pending_lock:
+                if self._pending.get((namespace, key)) is entry:
+                    del self._pending[(namespace, key)]
+
+    def _touch(self, namespace, key, now):
+        self._conn.execute(
+            "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, namespace, key)
+        )
+
+    def _evict(self, namespace, now):
+        self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        count = self._conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (namespace,)).fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                " SELECT key FROM cache WHERE namespace = ? ORDER BY accessed_at LIMIT ?)",
+                (namespace, namespace, count - self.max_entries)
+            )
+
+
+class TwoLevelCache:
+    """Cache à deux niveaux : LRU en mémoire devant un stockage SQLite partagé"""
+
+    def __init__(self, namespace, store, maxsize=1024):
+        self.namespace = namespace
+        self.store = store
+        self.memory = LRUCache(maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is MISSING and self.store is not None:
+            value, remaining_ttl = self.store.get(self.namespace, key)
+            if value is not MISSING:
+                self.memory.set(key, value, remaining_ttl)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl):
+        self.memory.set(key, value, ttl)
+        if self.store is not None:
+            self.store.set(self.namespace, key, value, ttl)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.store is not None:
+            self.store.delete(self.namespace, key)
+
+    def values(self):
+        """Valeurs non expirées (mémoire et stockage)"""
+        values = self.memory.values()
+        if self.store is not None:
+            values += self.store.values(self.namespace)
+        return values
+
+    def flush(self):
+        """Attend que les écritures en file vers le stockage soient faites"""
+        if self.store is not None:
+            self.store.flush()
+
+    def reload(self, key):
+        """Relit une entrée depuis le stockage (un autre worker a pu la rafraîchir)"""
+        if self.store is None:
+            return self.memory.get(key)
+        self.memory.delete(key)
+        return self.get(key)
+
+
+def _open_store():
+    if not CACHE_PATH:
+        return None
+    try:
+        return SQLiteStore(CACHE_PATH)
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Cache disque indisponible ({CACHE_PATH}): {e}")
+        return None
+
+
+_store = _open_store()
+
+# Niveau 1 : identifiant vidéo -> (titre, artiste, miniature)
+video_cache = TwoLevelCache("video", _store, maxsize=int(os.environ.get("LYRICS_VIDEO_LRU_SIZE", "2048")))
+# Niveau 2 : (artiste, titre) normalisés -> {"lyrics", "provider"} ou None (résultat négatif)
+lyrics_cache = TwoLevelCache("lyrics", _store, maxsize=int(os.environ.get("LYRICS_LYRICS_LRU_SIZE", "4096")))
+# Requête Google -> liens candidats [(site, url)] extraits de la page de résultats
+serp_cache = TwoLevelCache("serp", _store, maxsize=int(os.environ.get("LYRICS_SERP_LRU_SIZE", "2048")))
+# Historique de succès par type de variation de recherche -> {"tries", "hits"}
+planner_cache = TwoLevelCache("planner", _store, maxsize=64)
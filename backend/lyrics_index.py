@@ -0,0 +1,287 @@
+import gc
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+
+from lyrics_store import lyrics_store
+from telemetry import get_logger
+
+logger = get_logger("lyrics_index")
+
+# Index local des paroles déjà trouvées (ou importées) ; vide = index en mémoire seulement
+INDEX_PATH = os.environ.get("LYRICS_INDEX_PATH", os.path.join(tempfile.gettempdir(), "lyricsnap_index.sqlite3"))
+# Similarité minimale (0-1) pour accepter une correspondance sans interroger les fournisseurs
+INDEX_THRESHOLD = float(os.environ.get("LYRICS_INDEX_THRESHOLD", "0.8"))
+# Nombre de candidats (trigrammes de titre en commun) évalués par recherche
+INDEX_CANDIDATES = int(os.environ.get("LYRICS_INDEX_CANDIDATES", "50"))
+# Intervalle (secondes) de relecture des chansons ajoutées par les autres workers
+INDEX_REFRESH = float(os.environ.get("LYRICS_INDEX_REFRESH", "5"))
+
+# Similarité minimale du titre seul : un autre titre du même artiste ("Love Me" / "Love Me Do")
+# ne doit jamais être accepté grâce au poids de l'artiste
+INDEX_TITLE_THRESHOLD = float(os.environ.get("LYRICS_INDEX_TITLE_THRESHOLD", "0.9"))
+
+# Lignes lues par requête lors d'un parcours complet (lyrics_refs) : le verrou est rendu entre deux pages
+_SCAN_PAGE = 1000
+
+# Poids du titre dans le score (le reste va à l'artiste)
+TITLE_WEIGHT = 0.6
+
+_NOISE_RE = re.compile(
+    r'\[.*?\]|\(.*?\)|\b(?:official|video|audio|lyrics?|remix|version|edit|remaster(?:ed)?|explicit|hd|hq)\b'
+)
+_FEAT_RE = re.compile(r'\s+(?:feat|ft|featuring|with|x)\s+.*$|\s*[,&].*$')
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return text.casefold()
+
+
+def _words(text):
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text).split())
+
+
+def normalize_title(title):
+    """Titre normalisé pour la recherche floue (sans accents, ponctuation ni mentions parasites)"""
+    return _words(_NOISE_RE.sub(' ', _normalize(title).replace('.', '')))
+
+
+def normalize_artist(artist):
+    """Artiste principal normalisé (les invités feat./&/, sont retirés)"""
+    return _words(_FEAT_RE.sub('', _normalize(artist).replace('.', '')))
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    """Similarité de Jaccard entre deux ensembles de trigrammes"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class LyricsIndex:
+    """Paroles indexées par (artiste, titre) normalisés, avec recherche floue par trigrammes.
+
+    Les entrées sont stockées dans SQLite (le texte dans lyrics_store, par empreinte) ;
+    l'index de trigrammes est reconstruit en mémoire au premier accès, ce qui garde
+    les recherches sous la milliseconde.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._entries = None
+        self._ids = {}
+        self._lyrics = {}
+        self._postings = defaultdict(set)
+        self._last_id = 0
+        self._refreshed_at = 0.0
+        self.stats = {'lookups': 0, 'hits': 0, 'added': 0}
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS songs ("
+                    " id INTEGER PRIMARY KEY,"
+                    " artist TEXT NOT NULL,"
+                    " title TEXT NOT NULL,"
+                    " norm_artist TEXT NOT NULL,"
+                    " norm_title TEXT NOT NULL,"
+                    " lyrics_ref TEXT NOT NULL,"
+                    " provider TEXT,"
+                    " added_at REAL NOT NULL,"
+                    " UNIQUE (norm_artist, norm_title))"
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Index de paroles disque indisponible ({path}): {e}")
+                self._conn = None
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+        elif self._conn is None or time.monotonic() - self._refreshed_at < INDEX_REFRESH:
+            return
+        if self._conn is not None:
+            # Chargement complet au premier accès, puis seulement les lignes ajoutées depuis (autres workers)
+            rows = self._conn.execute(
+                "SELECT id, norm_artist, norm_title FROM songs WHERE id > ? ORDER BY id", (self._last_id,)
+            ).fetchall()
+            for song_id, norm_artist, norm_title in rows:
+                if song_id not in self._entries:
+                    self._index(song_id, norm_artist, norm_title)
+            self._refreshed_at = time.monotonic()
+
+    def _index(self, song_id, norm_artist, norm_title):
+        title_grams = trigrams(norm_title)
+        self._ids[(norm_artist, norm_title)] = song_id
+        self._entries[song_id] = (norm_artist, norm_title, trigrams(norm_artist), title_grams)
+        self._last_id = max(self._last_id, song_id)
+        for gram in title_grams:
+            self._postings[gram].add(song_id)
+
+    def add_many(self, rows):
+        """Ajoute des (artiste, titre, paroles, fournisseur) en une transaction ; retourne le nombre ajouté"""
+        added = 0
+        with self._lock:
+            self._load()
+            if self._conn is not None:
+                self._conn.execute("BEGIN")
+            try:
+                for artist, title, lyrics, provider in rows:
+                    norm_artist, norm_title = normalize_artist(artist), normalize_title(title)
+                    if not norm_title or not lyrics or not lyrics.strip() or (norm_artist, norm_title) in self._ids:
+                        continue
+                    try:
+                        song_id = self._store(artist, title, norm_artist, norm_title, lyrics, provider)
+                    except sqlite3.IntegrityError:
+                        # Ajoutée entre-temps par un autre worker : elle sera relue au prochain rafraîchissement
+                        continue
+                    self._index(song_id, norm_artist, norm_title)
+                    added += 1
+            finally:
+                if self._conn is not None:
+                    self._conn.execute("COMMIT")
+        self.stats['added'] += added
+        return added
+
+    def _store(self, artist, title, norm_artist, norm_title, lyrics, provider):
+        lyrics_ref = lyrics_store.put(lyrics)
+        if self._conn is None:
+            song_id = len(self._entries) + 1
+            self._lyrics[song_id] = (artist, title, lyrics_ref, provider)
+            return song_id
+        cursor = self._conn.execute(
+            "INSERT INTO songs (artist, title, norm_artist, norm_title, lyrics_ref, provider, added_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (artist, title, norm_artist, norm_title, lyrics_ref, provider, time.time())
+        )
+        return cursor.lastrowid
+
+    def add(self, artist, title, lyrics, provider=None):
+        return self.add_many([(artist, title, lyrics, provider)]) == 1
+
+    def load(self):
+        """Construit l'index de trigrammes (au démarrage, pour que la première recherche ne le paie pas)"""
+        start = time.perf_counter()
+        # Les objets créés par la construction déclencheraient des collectes complètes, qui figent
+        # aussi la boucle asyncio : le ramasse-miettes est suspendu, puis l'index en est exclu
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with self._lock:
+                self._load()
+                size = len(self._entries)
+        finally:
+            gc.freeze()
+            if gc_enabled:
+                gc.enable()
+        logger.info(f"📚 Index de paroles chargé : {size} chansons en {(time.perf_counter() - start) * 1000:.0f} ms")
+        return size
+
+    def lookup(self, artist, title, threshold=INDEX_THRESHOLD):
+        """Meilleure correspondance floue : {"lyrics", "provider", "artist", "title", "score"} ou None"""
+        norm_artist, norm_title = normalize_artist(artist), normalize_title(title)
+        artist_grams, title_grams = trigrams(norm_artist), trigrams(norm_title)
+        with self._lock:
+            self._load()
+            self.stats['lookups'] += 1
+            shared = Counter()
+            for gram in title_grams:
+                shared.update(self._postings.get(gram, ()))
+
+            best_id, best_score = None, 0.0
+            for song_id, _ in shared.most_common(INDEX_CANDIDATES):
+                entry_artist, entry_title, entry_artist_grams, entry_title_grams = self._entries[song_id]
+                if entry_artist == norm_artist and entry_title == norm_title:
+                    best_id, best_score = song_id, 1.0
+                    break
+                title_score = similarity(title_grams, entry_title_grams)
+                if title_score < INDEX_TITLE_THRESHOLD:
+                    continue
+                score = (TITLE_WEIGHT * title_score +
+                         (1 - TITLE_WEIGHT) * similarity(artist_grams, entry_artist_grams))
+                if score > best_score:
+                    best_id, best_score = song_id, score
+
+            if best_id is None or best_score < threshold:
+                return None
+            match = self._get(best_id)
+        match['lyrics'] = lyrics_store.get(match.pop('lyrics_ref'))
+        if not match['lyrics']:
+            return None
+        self.stats['hits'] += 1
+        return dict(match, score=round(best_score, 3))
+
+    def _get(self, song_id):
+        if self._conn is None:
+            artist, title, lyrics_ref, provider = self._lyrics[song_id]
+        else:
+            artist, title, lyrics_ref, provider = self._conn.execute(
+                "SELECT artist, title, lyrics_ref, provider FROM songs WHERE id = ?", (song_id,)
+            ).fetchone()
+        return {"lyrics_ref": lyrics_ref, "provider": provider, "artist": artist, "title": title}
+
+    def lyrics_refs(self):
+        """Empreintes (lyrics_store) des paroles indexées, lues par pages pour ne pas bloquer lookup()"""
+        if self._conn is None:
+            with self._lock:
+                return {lyrics_ref for _, _, lyrics_ref, _ in self._lyrics.values()}
+        refs, last = set(), 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, lyrics_ref FROM songs WHERE id > ? ORDER BY id LIMIT ?", (last, _SCAN_PAGE)
+                ).fetchall()
+            if not rows:
+                return refs
+            last = rows[-1][0]
+            refs.update(ref for _, ref in rows)
+
+    def import_jsonl(self, path, batch_size=1000):
+        """Import en masse d'un fichier JSON Lines ({"artist", "title", "lyrics"} par ligne)"""
+        added = 0
+        batch = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                batch.append((row['artist'], row['title'], row['lyrics'], row.get('provider', 'import')))
+                if len(batch) >= batch_size:
+                    added += self.add_many(batch)
+                    batch = []
+        return added + self.add_many(batch)
+
+    def snapshot(self):
+        with self._lock:
+            self._load()
+            return dict(self.stats, entries=len(self._entries), threshold=INDEX_THRESHOLD,
+                        title_threshold=INDEX_TITLE_THRESHOLD)
+
+
+lyrics_index = LyricsIndex()
+
+
+if __name__ == "__main__":
+    # python lyrics_index.py import paroles.jsonl
+    if len(sys.argv) != 3 or sys.argv[1] != "import":
+        print("Usage : python lyrics_index.py import <fichier.jsonl>")
+        sys.exit(1)
+    start = time.monotonic()
+    count = lyrics_index.import_jsonl(sys.argv[2])
+    print(f"✅ {count} chansons importées en {time.monotonic() - start:.1f}s ({INDEX_PATH})")
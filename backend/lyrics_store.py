@@ -0,0 +1,317 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+
+from telemetry import get_logger
+
+logger = get_logger("lyrics_store")
+
+# Stockage des textes de paroles, partagé par le cache et l'index ; vide = en mémoire
+STORE_PATH = os.environ.get("LYRICS_STORE_PATH", os.path.join(tempfile.gettempdir(), "lyricsnap_lyrics.sqlite3"))
+# Les lignes répétées (refrains) sont stockées une fois puis référencées
+LINE_REFS = os.environ.get("LYRICS_STORE_LINE_REFS", "1") == "1"
+# Taille du dictionnaire zlib partagé et nombre de textes à stocker avant de l'entraîner
+DICT_SIZE = int(os.environ.get("LYRICS_STORE_DICT_SIZE", str(32 * 1024)))
+TRAIN_AFTER = int(os.environ.get("LYRICS_STORE_TRAIN_AFTER", "500"))
+# Taille de la projection mémoire (mmap) du fichier SQLite
+MMAP_SIZE = int(os.environ.get("LYRICS_STORE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Âge minimal (secondes) d'un texte non référencé avant sa suppression : laisse le temps
+# au cache ou à l'index (de ce worker ou d'un autre) d'enregistrer l'empreinte après put()
+GC_GRACE = float(os.environ.get("LYRICS_STORE_GC_GRACE", "600"))
+# Textes examinés puis supprimés par lot : le verrou est rendu entre deux lots
+GC_BATCH = int(os.environ.get("LYRICS_STORE_GC_BATCH", "500"))
+
+PLAIN, LINE_REFERENCES = 0, 1
+
+# Marqueur de référence vers une ligne précédente (ne peut pas apparaître dans des paroles)
+_LINE_REF = '\x1e'
+# Lignes trop courtes pour qu'une référence soit rentable
+_MIN_REF_LINE = 8
+
+
+def content_hash(lyrics):
+    return hashlib.sha256(lyrics.encode('utf-8')).hexdigest()[:32]
+
+
+def encode_lines(lyrics):
+    """Remplace chaque ligne déjà vue par une référence à sa première occurrence"""
+    first_seen = {}
+    lines = []
+    for line in lyrics.split('\n'):
+        if len(line) >= _MIN_REF_LINE and line in first_seen:
+            lines.append(f"{_LINE_REF}{first_seen[line]}")
+        else:
+            first_seen.setdefault(line, len(lines))
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def decode_lines(encoded):
+    lines = []
+    for line in encoded.split('\n'):
+        lines.append(lines[int(line[1:])] if line.startswith(_LINE_REF) else line)
+    return '\n'.join(lines)
+
+
+def train_dictionary(samples, size=DICT_SIZE):
+    """Dictionnaire zlib construit à partir des lignes puis des mots les plus fréquents d'un échantillon.
+
+    Les fragments les plus fréquents sont placés à la fin : zlib référence les
+    distances courtes à moindre coût.
+    """
+    lines = Counter(line for sample in samples for line in set(sample.split('\n')) if len(line.strip()) > 3)
+    words = Counter(word for sample in samples for word in set(sample.split()) if len(word) > 2)
+    chosen = []
+    total = 0
+    for counts, separator in ((lines, '\n'), (words, ' ')):
+        for fragment, count in counts.most_common():
+            chunk = (fragment + separator).encode('utf-8')
+            if count < 2 or total + len(chunk) > size:
+                break
+            chosen.append(chunk)
+            total += len(chunk)
+    return b''.join(reversed(chosen))
+
+
+class LyricsStore:
+    """Textes de paroles dédupliqués par empreinte de contenu et compressés (zlib + dictionnaire partagé).
+
+    Les entrées du cache et de l'index ne gardent que l'empreinte : une même chanson
+    associée à plusieurs vidéos ou variations n'est stockée qu'une fois. Les textes
+    qui ne sont plus référencés sont supprimés par collect().
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._memory = {}
+        self._stored_at = {}
+        self._dictionaries = {0: b''}
+        self._current_dict = 0
+        self._next_training = TRAIN_AFTER
+        self.stats = {'puts': 0, 'deduplicated': 0, 'raw_bytes': 0, 'stored_bytes': 0, 'collected': 0}
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS blobs ("
+                    " hash TEXT PRIMARY KEY,"
+                    " dict_id INTEGER NOT NULL,"
+                    " encoding INTEGER NOT NULL,"
+                    " raw_size INTEGER NOT NULL,"
+                    " data BLOB NOT NULL,"
+                    " stored_at REAL NOT NULL DEFAULT 0)"
+                )
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(blobs)")}
+                if 'stored_at' not in columns:
+                    self._conn.execute("ALTER TABLE blobs ADD COLUMN stored_at REAL NOT NULL DEFAULT 0")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS dictionaries (id INTEGER PRIMARY KEY, data BLOB NOT NULL, created_at REAL NOT NULL)"
+                )
+                for dict_id, data in self._conn.execute("SELECT id, data FROM dictionaries ORDER BY id"):
+                    self._dictionaries[dict_id] = data
+                    self._current_dict = dict_id
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Stockage des paroles disque indisponible ({path}): {e}")
+                self._conn = None
+
+    def _compress(self, lyrics):
+        encoding = PLAIN
+        if LINE_REFS and _LINE_REF not in lyrics:
+            lyrics, encoding = encode_lines(lyrics), LINE_REFERENCES
+        compressor = zlib.compressobj(9, zdict=self._dictionaries[self._current_dict]) if self._current_dict \
+            else zlib.compressobj(9)
+        return encoding, compressor.compress(lyrics.encode('utf-8')) + compressor.flush()
+
+    def _dictionary(self, dict_id):
+        # Dictionnaire entraîné par un autre worker depuis l'ouverture du stockage
+        if dict_id not in self._dictionaries and self._conn is not None:
+            row = self._conn.execute("SELECT data FROM dictionaries WHERE id = ?", (dict_id,)).fetchone()
+            if row is not None:
+                self._dictionaries[dict_id] = row[0]
+        return self._dictionaries[dict_id]
+
+    def _decompress(self, dict_id, encoding, data):
+        decompressor = zlib.decompressobj(zdict=self._dictionary(dict_id)) if dict_id else zlib.decompressobj()
+        text = (decompressor.decompress(data) + decompressor.flush()).decode('utf-8')
+        return decode_lines(text) if encoding == LINE_REFERENCES else text
+
+    def put(self, lyrics):
+        """Stocke un texte (s'il est nouveau) et retourne son empreinte"""
+        digest = content_hash(lyrics)
+        now = time.time()
+        with self._lock:
+            self.stats['puts'] += 1
+            if self._exists(digest):
+                self.stats['deduplicated'] += 1
+                # Rafraîchi : le texte va être (re)référencé, collect() doit le laisser en paix
+                self._touch(digest, now)
+                return digest
+            encoding, data = self._compress(lyrics)
+            row = (self._current_dict, encoding, len(lyrics.encode('utf-8')), data)
+            if self._conn is None:
+                self._memory[digest] = row
+                self._stored_at[digest] = now
+            else:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, dict_id, encoding, raw_size, data, stored_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest,) + row + (now,)
+                )
+            self.stats['raw_bytes'] += row[2]
+            self.stats['stored_bytes'] += len(data)
+            should_train = not self._current_dict and self._count() >= self._next_training
+            if should_train and self._adopt_latest_dictionary():
+                should_train = False
+        if should_train:
+            self.train()
+        return digest
+
+    def get(self, digest):
+        """Texte associé à une empreinte (None s'il n'est plus stocké)"""
+        with self._lock:
+            if self._conn is None:
+                row = self._memory.get(digest)
+            else:
+                row = self._conn.execute(
+                    "SELECT dict_id, encoding, raw_size, data FROM blobs WHERE hash = ?", (digest,)
+                ).fetchone()
+        if row is None:
+            return None
+        dict_id, encoding, _, data = row
+        return self._decompress(dict_id, encoding, data)
+
+    def _exists(self, digest):
+        if self._conn is None:
+            return digest in self._memory
+        return self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is not None
+
+    def _touch(self, digest, now):
+        if self._conn is None:
+            self._stored_at[digest] = now
+        else:
+            self._conn.execute("UPDATE blobs SET stored_at = ? WHERE hash = ?", (now, digest))
+
+    def collect(self, live_refs, grace=GC_GRACE):
+        """Supprime les textes absents de `live_refs` (empreintes encore référencées) et plus vieux que `grace`.
+
+        Le parcours et les suppressions se font par lots de GC_BATCH, sans garder le
+        verrou entre deux lots : get() et put() ne sont pas bloqués pendant la collecte.
+        Retourne le nombre de textes supprimés.
+        """
+        cutoff = time.time() - grace
+        collected = 0
+        for candidates in self._old_blobs(cutoff):
+            dead = [digest for digest in candidates if digest not in live_refs]
+            if not dead:
+                continue
+            with self._lock:
+                # stored_at revérifié : un put() a pu rafraîchir le texte depuis le parcours
+                if self._conn is None:
+                    dead = [digest for digest in dead if self._stored_at.get(digest, cutoff) < cutoff]
+                    for digest in dead:
+                        del self._memory[digest], self._stored_at[digest]
+                    deleted = len(dead)
+                else:
+                    self._conn.execute("BEGIN")
+                    try:
+                        deleted = self._conn.executemany(
+                            "DELETE FROM blobs WHERE hash = ? AND stored_at < ?", ((digest, cutoff) for digest in dead)
+                        ).rowcount
+                    finally:
+                        self._conn.execute("COMMIT")
+                self.stats['collected'] += deleted
+            collected += deleted
+        if collected:
+            logger.info(f"🧹 {collected} textes de paroles non référencés supprimés")
+        return collected
+
+    def _old_blobs(self, cutoff):
+        """Empreintes des textes stockés avant `cutoff`, par lots de GC_BATCH"""
+        if self._conn is None:
+            with self._lock:
+                old = [digest for digest, stored_at in self._stored_at.items() if stored_at < cutoff]
+            for start in range(0, len(old), GC_BATCH):
+                yield old[start:start + GC_BATCH]
+            return
+        last = ''
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT hash, stored_at FROM blobs WHERE hash > ? ORDER BY hash LIMIT ?", (last, GC_BATCH)
+                ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [digest for digest, stored_at in rows if stored_at < cutoff]
+
+    def _count(self):
+        if self._conn is None:
+            return len(self._memory)
+        return self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def _adopt_latest_dictionary(self):
+        # Un autre worker a déjà entraîné un dictionnaire : on l'utilise plutôt que d'en créer un second
+        if self._conn is None:
+            return False
+        latest = self._conn.execute("SELECT id, data FROM dictionaries ORDER BY id DESC LIMIT 1").fetchone()
+        if latest is None:
+            return False
+        self._dictionaries[latest[0]] = latest[1]
+        self._current_dict = latest[0]
+        return True
+
+    def _samples(self, limit):
+        if self._conn is None:
+            rows = list(self._memory.values())[-limit:]
+        else:
+            rows = self._conn.execute(
+                "SELECT dict_id, encoding, raw_size, data FROM blobs ORDER BY rowid DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._decompress(dict_id, encoding, data) for dict_id, encoding, _, data in rows]
+
+    def train(self, sample_size=2000):
+        """Entraîne un nouveau dictionnaire sur les textes récents ; les nouveaux textes l'utiliseront"""
+        with self._lock:
+            dictionary = train_dictionary(self._samples(sample_size))
+            if not dictionary:
+                # Échantillon sans répétitions : nouvel essai quand le stock aura doublé
+                self._next_training = self._count() * 2
+                return None
+            if self._conn is None:
+                dict_id = max(self._dictionaries) + 1
+            else:
+                dict_id = self._conn.execute(
+                    "INSERT INTO dictionaries (data, created_at) VALUES (?, ?)", (dictionary, time.time())
+                ).lastrowid
+            self._dictionaries[dict_id] = dictionary
+            self._current_dict = dict_id
+        logger.info(f"🗜️ Dictionnaire de compression {dict_id} entraîné ({len(dictionary)} octets)")
+        return dict_id
+
+    def snapshot(self):
+        with self._lock:
+            if self._conn is None:
+                raw, stored = (sum(row[2] for row in self._memory.values()),
+                               sum(len(row[3]) for row in self._memory.values()))
+            else:
+                raw, stored = self._conn.execute("SELECT COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+            return dict(
+                self.stats,
+                blobs=self._count(),
+                dictionary=self._current_dict,
+                total_raw_bytes=raw,
+                total_stored_bytes=stored,
+                ratio=round(raw / stored, 2) if stored else None,
+            )
+
+
+lyrics_store = LyricsStore()
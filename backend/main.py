@@ -0,0 +1,3 @@
+# Point d'entrée serverless (vercel.json) : seule l'application est importée ici,
+# yt-dlp et bs4 sont chargés à la première requête qui en a besoin
+from you import app  # noqa: F401
@@ -0,0 +1,206 @@
+import os
+import time
+from collections import deque
+
+import httpx
+
+from shared_state import shared_state
+from telemetry import get_logger
+
+logger = get_logger("provider_health")
+
+# Nombre d'échecs consécutifs (403/429/5xx/timeouts) avant d'ouvrir le disjoncteur
+FAILURE_THRESHOLD = int(os.environ.get("LYRICS_BREAKER_THRESHOLD", "3"))
+# Durée d'ouverture initiale, doublée à chaque sonde ratée jusqu'au maximum
+COOLDOWN = float(os.environ.get("LYRICS_BREAKER_COOLDOWN", "60"))
+MAX_COOLDOWN = float(os.environ.get("LYRICS_BREAKER_MAX_COOLDOWN", "900"))
+# Taille de la fenêtre glissante utilisée pour classer les fournisseurs
+HEALTH_WINDOW = int(os.environ.get("LYRICS_HEALTH_WINDOW", "50"))
+# Latence (secondes) qui divise par deux le score d'un fournisseur
+LATENCY_SCALE = float(os.environ.get("LYRICS_HEALTH_LATENCY_SCALE", "5"))
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+# Champs du disjoncteur partagés entre workers (les horodatages sont en temps réel, time.time())
+_SHARED_FIELDS = ('state', 'failures', 'opened_at', 'cooldown', 'probe_in_flight', 'probe_started')
+
+
+class CircuitOpenError(httpx.RequestError):
+    """Requête refusée localement : le disjoncteur de l'hôte est ouvert"""
+
+
+class CircuitBreaker:
+    """Disjoncteur fermé / ouvert / semi-ouvert (une seule sonde à la fois).
+
+    En mode multi-processus, l'état est partagé : un hôte coupé l'est pour tous les workers.
+    """
+
+    def __init__(self, name, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+        self.stats = {'opened': 0, 'rejected': 0, 'probes': 0}
+
+    def _sync(self, update):
+        if shared_state is None:
+            return update()
+        return shared_state.sync('breaker', self.name, self, _SHARED_FIELDS, update)
+
+    def _load(self):
+        if shared_state is not None:
+            shared_state.load('breaker', self.name, self)
+
+    def _probe_pending(self, now):
+        # Une sonde sans verdict après un délai complet est abandonnée (worker arrêté en cours de route)
+        return self.probe_in_flight and now - self.probe_started < self.cooldown
+
+    def is_open(self):
+        """Vrai si l'hôte doit être évité (sans consommer de sonde) ; lecture seule"""
+        self._load()
+        return self._is_open()
+
+    def _is_open(self):
+        now = time.time()
+        if self.state == OPEN:
+            return now - self.opened_at < self.cooldown
+        return self.state == HALF_OPEN and self._probe_pending(now)
+
+    def allow(self):
+        """Autorise (ou non) une requête ; passe en semi-ouvert après le délai"""
+        # Cas courants (fermé, ou ouvert pendant le délai) : simple lecture, sans transaction d'écriture
+        self._load()
+        if self.state == CLOSED:
+            allowed = True
+        elif self._is_open():
+            allowed = False
+        else:
+            allowed = self._sync(self._allow)
+        if not allowed:
+            self.stats['rejected'] += 1
+        return allowed
+
+    def _allow(self):
+        now = time.time()
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probe_pending(now):
+            self.probe_in_flight = True
+            self.probe_started = now
+            self.stats['probes'] += 1
+            return True
+        return False
+
+    def record_success(self):
+        # État nominal (relu par allow() juste avant la requête) : rien à écrire
+        if self.state == CLOSED and not self.failures:
+            return
+        self._sync(self._record_success)
+
+    def _record_success(self):
+        if self.state != CLOSED:
+            logger.info(f"✅ Disjoncteur {self.name} refermé")
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self._sync(self._record_failure)
+
+    def _record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN)
+            self._open()
+        elif self.state == CLOSED and self.failures >= self.threshold:
+            self._open()
+
+    def release(self):
+        """Libère la sonde sans verdict (requête annulée)"""
+        self._sync(self._release)
+
+    def _release(self):
+        self.probe_in_flight = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.time()
+        self.probe_in_flight = False
+        self.stats['opened'] += 1
+        logger.warning(f"🔌 Disjoncteur {self.name} ouvert pour {self.cooldown:.0f}s")
+
+    def snapshot(self):
+        return dict(self.stats, state=self.state, failures=self.failures, cooldown=self.cooldown)
+
+
+class ProviderHealth:
+    """Taux de succès et latence d'un fournisseur sur une fenêtre glissante"""
+
+    def __init__(self, window=HEALTH_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def record(self, found, latency):
+        self.samples.append((bool(found), latency))
+
+    def success_rate(self):
+        # Lissage de Laplace : un fournisseur sans historique vaut 0.5
+        successes = sum(1 for found, _ in self.samples if found)
+        return (successes + 1) / (len(self.samples) + 2)
+
+    def mean_latency(self):
+        if not self.samples:
+            return 0.0
+        return sum(latency for _, latency in self.samples) / len(self.samples)
+
+    def score(self):
+        return self.success_rate() / (1 + self.mean_latency() / LATENCY_SCALE)
+
+    def snapshot(self):
+        return {
+            'samples': len(self.samples),
+            'success_rate': round(self.success_rate(), 3),
+            'mean_latency': round(self.mean_latency(), 3),
+            'score': round(self.score(), 3),
+        }
+
+
+_breakers = {}
+_health = {}
+
+
+def get_breaker(name):
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def get_health(name):
+    health = _health.get(name)
+    if health is None:
+        health = _health[name] = ProviderHealth()
+    return health
+
+
+def rank_providers(names):
+    """Trie les fournisseurs par score décroissant et écarte ceux dont le disjoncteur est ouvert.
+
+    À score égal, l'ordre configuré est conservé.
+    """
+    available = [name for name in names if not get_breaker(name).is_open()]
+    return sorted(available, key=lambda name: -get_health(name).score())
+
+
+def health_stats():
+    return {
+        'breakers': {name: breaker.snapshot() for name, breaker in _breakers.items()},
+        'providers': {name: health.snapshot() for name, health in _health.items()},
+    }
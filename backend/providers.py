@@ -0,0 +1,98 @@
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+from lyrics_cache import normalize_key
+
+# Budget de latence de bout en bout d'une requête /api/extract (secondes)
+REQUEST_BUDGET = float(os.environ.get("LYRICS_REQUEST_BUDGET", "25"))
+# Une tentative ne reçoit jamais moins que ce délai, même en fin de budget
+MIN_ATTEMPT_TIMEOUT = float(os.environ.get("LYRICS_MIN_ATTEMPT_TIMEOUT", "1"))
+
+_deadline = contextvars.ContextVar("lyrics_deadline", default=None)
+
+
+class Provider:
+    """Fournisseur de paroles : coroutine `fetch(artist, title)` et ses limites.
+
+    `cost` est le nombre approximatif de requêtes sortantes d'un appel ; il sert à
+    répartir le budget entre les tentatives. `timeout` borne un appel et
+    `concurrency` le nombre d'appels simultanés. `key(artist, title)` identifie la
+    requête réellement envoyée : deux variations de même clé sont équivalentes
+    pour ce fournisseur (par défaut, la forme normalisée du couple).
+    """
+
+    def __init__(self, name, label, fetch, cost=1, timeout=10, concurrency=8, key=None):
+        self.name = name
+        self.label = label
+        self.fetch = fetch
+        self.key = key or normalize_key
+        self.cost = cost
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    def snapshot(self):
+        return {
+            'label': self.label,
+            'cost': self.cost,
+            'timeout': self.timeout,
+            'concurrency': self.concurrency,
+            'in_flight': self.concurrency - self.semaphore._value,
+        }
+
+    def attempt_timeout(self, share=None):
+        """Délai accordé à une tentative : timeout propre, part du budget et budget restant"""
+        limits = [limit for limit in (share, remaining_budget()) if limit is not None]
+        if not limits:
+            return self.timeout
+        return min(self.timeout, max(min(limits), MIN_ATTEMPT_TIMEOUT))
+
+
+PROVIDERS = {}
+
+
+def register_provider(name, label, fetch, cost=1, timeout=10, concurrency=8, key=None):
+    """Enregistre un fournisseur (l'ordre d'enregistrement est la priorité par défaut)"""
+    PROVIDERS[name] = Provider(name, label, fetch, cost, timeout, concurrency, key)
+    return PROVIDERS[name]
+
+
+def get_provider(name):
+    return PROVIDERS[name]
+
+
+@contextmanager
+def request_budget(seconds=REQUEST_BUDGET):
+    """Borne la requête courante à `seconds` (sans effet si un budget est déjà actif)"""
+    if _deadline.get() is not None:
+        yield
+        return
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget():
+    """Secondes restantes pour la requête courante (None s'il n'y a pas de budget)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def split_budget(names):
+    """Répartit le budget restant entre des tentatives successives, au prorata de leur coût"""
+    remaining = remaining_budget()
+    if remaining is None:
+        return {name: None for name in names}
+    total_cost = sum(PROVIDERS[name].cost for name in names) or 1
+    return {name: remaining * PROVIDERS[name].cost / total_cost for name in names}
+
+
+def provider_stats():
+    return dict(budget=REQUEST_BUDGET, registry={name: provider.snapshot() for name, provider in PROVIDERS.items()})
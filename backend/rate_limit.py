@@ -0,0 +1,145 @@
+import asyncio
+import email.utils
+import os
+import time
+
+from shared_state import run_shared, shared_state
+
+# Débit (requêtes/s) et rafale autorisés par hôte fournisseur
+RATE_LIMITS = {
+    'ovh': (5.0, 10),
+    'musixmatch': (0.5, 2),
+    'azlyrics': (0.33, 2),
+    'google': (0.5, 2),
+    'genius': (2.0, 4),
+    'youtube': (10.0, 20),
+    'default': (2.0, 4),
+}
+
+# Surcharge par variable d'environnement, ex: LYRICS_RATE_LIMITS="google=0.2/1,azlyrics=1/3"
+for _item in filter(None, os.environ.get("LYRICS_RATE_LIMITS", "").split(",")):
+    _name, _, _spec = _item.partition("=")
+    _rate, _, _burst = _spec.partition("/")
+    RATE_LIMITS[_name.strip()] = (float(_rate), int(_burst or 1))
+
+# Le débit ne descend jamais sous cette fraction du débit configuré
+MIN_RATE_FACTOR = 0.1
+# Durée maximale de blocage acceptée depuis un Retry-After
+MAX_RETRY_AFTER = 120.0
+
+
+def parse_retry_after(value):
+    """Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(retry_at.timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# Champs du seau partagés entre workers (les horodatages sont en temps réel, time.time())
+_SHARED_FIELDS = ('rate', 'tokens', 'blocked_until', '_updated')
+
+
+class TokenBucket:
+    """Seau à jetons asynchrone avec ralentissement adaptatif (AIMD) sur 403/429.
+
+    En mode multi-processus, l'état du seau est lu et écrit dans l'état partagé à
+    chaque opération (depuis un thread, hors de la boucle asyncio) : le débit
+    configuré vaut pour l'ensemble des workers.
+    """
+
+    def __init__(self, rate, burst, name=None):
+        self.name = name
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self._updated = time.time()
+        self._lock = asyncio.Lock()
+        self.stats = {'acquired': 0, 'throttled': 0, 'throttle_time': 0.0, 'backoffs': 0}
+
+    def _sync(self, update):
+        if shared_state is None or self.name is None:
+            return update()
+        return shared_state.sync('bucket', self.name, self, _SHARED_FIELDS, update)
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Attend un jeton ; ne dort que si le seau est vide ou l'hôte bloqué"""
+        async with self._lock:
+            waited = 0.0
+            while True:
+                wait = await run_shared(self._sync, self._take)
+                if wait <= 0:
+                    break
+                waited += wait
+                await asyncio.sleep(wait)
+
+            self.stats['acquired'] += 1
+            if waited:
+                self.stats['throttled'] += 1
+                self.stats['throttle_time'] += waited
+            return waited
+
+    def _take(self):
+        """Prend un jeton si possible ; retourne l'attente nécessaire (0 si le jeton est pris)"""
+        now = time.time()
+        self._refill(now)
+        wait = self.blocked_until - now
+        if wait <= 0:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            wait = (1 - self.tokens) / self.rate
+        return wait
+
+    def penalize(self, retry_after=None):
+        """L'hôte a répondu 403/429 : on divise le débit et on respecte Retry-After"""
+        self._sync(lambda: self._penalize(retry_after))
+        self.stats['backoffs'] += 1
+
+    def _penalize(self, retry_after):
+        now = time.time()
+        self._refill(now)
+        self.rate = max(self.base_rate * MIN_RATE_FACTOR, self.rate / 2)
+        self.tokens = 0.0
+        delay = min(retry_after, MAX_RETRY_AFTER) if retry_after is not None else 1 / self.rate
+        self.blocked_until = max(self.blocked_until, now + delay)
+
+    def reward(self):
+        """Réponse normale : le débit remonte progressivement vers sa valeur configurée"""
+        if self.rate < self.base_rate:
+            self._sync(self._reward)
+
+    def _reward(self):
+        self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+    def snapshot(self):
+        return dict(self.stats, rate=round(self.rate, 3), base_rate=self.base_rate, burst=self.burst)
+
+
+_buckets = {}
+
+
+def get_limiter(name):
+    """Retourne le seau à jetons partagé de l'hôte `name`"""
+    bucket = _buckets.get(name)
+    if bucket is None:
+        rate, burst = RATE_LIMITS.get(name, RATE_LIMITS['default'])
+        bucket = _buckets[name] = TokenBucket(rate, burst, name)
+    return bucket
+
+
+def limiter_stats():
+    return {name: bucket.snapshot() for name, bucket in _buckets.items()}
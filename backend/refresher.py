@@ -0,0 +1,182 @@
+import asyncio
+import contextvars
+import heapq
+import math
+import os
+import time
+
+from shared_state import run_shared, shared_state
+from telemetry import count, get_logger
+
+logger = get_logger("refresher")
+
+# Demi-vie (secondes) des compteurs de popularité
+POPULARITY_HALF_LIFE = float(os.environ.get("LYRICS_POPULARITY_HALF_LIFE", str(24 * 3600)))
+# Nombre de clés suivies ; au-delà, les moins demandées sont oubliées
+POPULARITY_MAX_KEYS = int(os.environ.get("LYRICS_POPULARITY_MAX_KEYS", "10000"))
+# Score (requêtes, avec décroissance) à partir duquel une entrée est rafraîchie avant d'expirer
+HOT_THRESHOLD = float(os.environ.get("LYRICS_HOT_THRESHOLD", "3"))
+# Fraction du TTL après laquelle une entrée populaire est rafraîchie
+REFRESH_AHEAD = float(os.environ.get("LYRICS_REFRESH_AHEAD", "0.8"))
+# Intervalle (secondes) entre deux passages sur les entrées les plus populaires
+REFRESH_INTERVAL = float(os.environ.get("LYRICS_REFRESH_INTERVAL", "300"))
+# Entrées populaires examinées par passage et rafraîchissements simultanés
+REFRESH_BATCH = int(os.environ.get("LYRICS_REFRESH_BATCH", "50"))
+REFRESH_CONCURRENCY = int(os.environ.get("LYRICS_REFRESH_CONCURRENCY", "2"))
+
+
+def needs_refresh(fetched_at, ttl):
+    """Vrai si une entrée récupérée à `fetched_at` a dépassé REFRESH_AHEAD de son TTL"""
+    return time.time() - fetched_at > ttl * REFRESH_AHEAD
+
+
+class Popularity:
+    """Compteurs de requêtes par clé, avec décroissance exponentielle (demi-vie configurable)"""
+
+    def __init__(self, half_life=POPULARITY_HALF_LIFE, max_keys=POPULARITY_MAX_KEYS):
+        self.decay = math.log(2) / half_life
+        self.max_keys = max_keys
+        # clé -> [score, mis à jour à, payload]
+        self._entries = {}
+
+    def _decayed(self, entry, now):
+        return entry[0] * math.exp(-self.decay * (now - entry[1]))
+
+    def hit(self, key, payload=None):
+        now = time.time()
+        entry = self._entries.get(key)
+        score = self._decayed(entry, now) + 1 if entry else 1.0
+        self._entries[key] = [score, now, payload if payload is not None else entry and entry[2]]
+        if len(self._entries) > self.max_keys:
+            self._forget(now)
+
+    def score(self, key):
+        entry = self._entries.get(key)
+        return self._decayed(entry, time.time()) if entry else 0.0
+
+    def hottest(self, limit):
+        """[(clé, score, payload)] des clés les plus demandées"""
+        now = time.time()
+        scored = ((key, self._decayed(entry, now), entry[2]) for key, entry in self._entries.items())
+        return heapq.nlargest(limit, scored, key=lambda item: item[1])
+
+    def _forget(self, now):
+        # On garde la moitié la plus populaire
+        keep = heapq.nlargest(self.max_keys // 2, self._entries.items(), key=lambda item: self._decayed(item[1], now))
+        self._entries = dict(keep)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Refresher:
+    """Rafraîchit en arrière-plan les entrées de cache populaires ou servies périmées.
+
+    `refresh(key, payload)` est une coroutine qui recharge l'entrée ; `is_due(key, payload)`
+    indique si une entrée populaire approche de son expiration. Une clé n'est pas
+    rafraîchie deux fois en moins de REFRESH_INTERVAL secondes.
+    """
+
+    def __init__(self, name, refresh, is_due, workers=REFRESH_CONCURRENCY):
+        self.name = name
+        self.refresh = refresh
+        self.is_due = is_due
+        self.workers = workers
+        self.popularity = Popularity()
+        self._queue = None
+        self._scanner = None
+        self._tasks = []
+        self._pending = set()
+        self._refreshed_at = {}
+        self.stats = {'scheduled': 0, 'refreshed': 0, 'failed': 0, 'skipped': 0, 'scans': 0}
+
+    def track(self, key, payload=None):
+        """Compte une requête pour `key` (payload : de quoi la rafraîchir)"""
+        self.popularity.hit(key, payload)
+
+    def start(self):
+        """Démarre les workers et le passage périodique sur les entrées populaires"""
+        self._ensure_workers()
+        if self._scanner is None or self._scanner.done():
+            self._scanner = asyncio.create_task(self._scan_loop(), context=contextvars.Context())
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [task for task in self._tasks if not task.done()]
+        for _ in range(self.workers - len(self._tasks)):
+            # Contexte vierge : un worker démarré pendant une requête n'hérite pas de sa trace
+            self._tasks.append(asyncio.create_task(self._worker(), context=contextvars.Context()))
+
+    def schedule(self, key, payload):
+        """Demande un rafraîchissement (ignoré s'il est déjà en file ou récent)"""
+        self._ensure_workers()
+        now = time.time()
+        if key in self._pending or now - self._refreshed_at.get(key, 0) < REFRESH_INTERVAL:
+            return False
+        if len(self._refreshed_at) > POPULARITY_MAX_KEYS:
+            self._refreshed_at = {k: at for k, at in self._refreshed_at.items() if now - at < REFRESH_INTERVAL}
+        self._pending.add(key)
+        self._queue.put_nowait((key, payload))
+        self.stats['scheduled'] += 1
+        return True
+
+    async def _scan_loop(self):
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL)
+            self.scan()
+
+    def scan(self):
+        """Planifie les entrées populaires proches de l'expiration"""
+        self.stats['scans'] += 1
+        for key, score, payload in self.popularity.hottest(REFRESH_BATCH):
+            if score < HOT_THRESHOLD:
+                break
+            try:
+                if self.is_due(key, payload):
+                    self.schedule(key, payload)
+            except Exception as e:
+                logger.warning(f"⚠️ Rafraîchissement {self.name} {key}: {e}")
+
+    async def _worker(self):
+        while True:
+            key, payload = await self._queue.get()
+            try:
+                await self._refresh(key, payload)
+            finally:
+                self._pending.discard(key)
+                self._refreshed_at[key] = time.time()
+                self._queue.task_done()
+
+    async def _refresh(self, key, payload):
+        # Multi-processus : un seul worker rafraîchit une clé donnée
+        lease = f"refresh|{self.name}|{key}"
+        if shared_state is not None and not await run_shared(shared_state.acquire_lease, lease, REFRESH_INTERVAL):
+            self.stats['skipped'] += 1
+            return
+        try:
+            found = await self.refresh(key, payload)
+            self.stats['refreshed' if found else 'failed'] += 1
+            count("refresh", cache=self.name, result="ok" if found else "failed")
+        except Exception as e:
+            self.stats['failed'] += 1
+            count("refresh", cache=self.name, result="error")
+            logger.warning(f"⚠️ Échec du rafraîchissement {self.name} {key}: {e}")
+        # Le bail n'est pas libéré : il espace aussi les rafraîchissements entre workers
+
+    def snapshot(self):
+        hot = self.popularity.hottest(5)
+        return dict(
+            self.stats,
+            tracked=len(self.popularity),
+            pending=len(self._pending),
+            hottest=[{'key': key, 'score': round(score, 2)} for key, score, _ in hot],
+        )
+
+    async def close(self):
+        tasks = self._tasks + ([self._scanner] if self._scanner else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._scanner = None
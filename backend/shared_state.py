@@ -0,0 +1,174 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from telemetry import get_logger
+
+logger = get_logger("shared_state")
+
+# Nombre de processus uvicorn ; au-delà de 1, l'état des limiteurs, des disjoncteurs,
+# des recherches en cours et des jobs est partagé entre eux via SQLite
+WORKERS = int(os.environ.get("LYRICS_WORKERS", "1"))
+SHARED_STATE_PATH = os.environ.get(
+    "LYRICS_SHARED_STATE_PATH", os.path.join(tempfile.gettempdir(), "lyricsnap_state.sqlite3")
+)
+# Attente maximale d'un verrou d'écriture SQLite tenu par un autre processus
+BUSY_TIMEOUT = float(os.environ.get("LYRICS_SHARED_BUSY_TIMEOUT", "5"))
+# Threads qui exécutent les écritures partagées hors de la boucle asyncio
+SHARED_STATE_THREADS = int(os.environ.get("LYRICS_SHARED_STATE_THREADS", "4"))
+
+
+class SharedState:
+    """État partagé entre processus : objets JSON par (scope, nom) et baux exclusifs.
+
+    Chaque lecture-modification-écriture se fait dans une transaction
+    BEGIN IMMEDIATE : un seul processus à la fois modifie l'état. Les lectures
+    seules passent par une seconde connexion (lecteur WAL) et n'attendent jamais
+    le verrou d'écriture.
+    """
+
+    def __init__(self, path=SHARED_STATE_PATH):
+        self.path = path
+        self.owner = f"{os.getpid()}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            " scope TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " PRIMARY KEY (scope, name))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.stats = {'syncs': 0, 'writes': 0, 'loads': 0, 'leases_acquired': 0, 'leases_busy': 0}
+
+    def sync(self, scope, name, obj, fields, update):
+        """Charge `fields` de `obj` depuis l'état partagé, appelle `update()` puis réécrit les champs.
+
+        Retourne le résultat de `update()`.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT value FROM state WHERE scope = ? AND name = ?", (scope, name)
+                ).fetchone()
+                if row is not None:
+                    for field, value in json.loads(row[0]).items():
+                        setattr(obj, field, value)
+                before = {field: getattr(obj, field) for field in fields}
+                result = update()
+                after = {field: getattr(obj, field) for field in fields}
+                # Rien n'a changé : pas d'écriture
+                if row is None or after != before:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO state (scope, name, value, expires_at) VALUES (?, ?, ?, NULL)",
+                        (scope, name, json.dumps(after))
+                    )
+                    self.stats['writes'] += 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.stats['syncs'] += 1
+            return result
+
+    def load(self, scope, name, obj):
+        """Relit l'état partagé de `obj` sans transaction d'écriture ; faux s'il n'existe pas encore"""
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT value FROM state WHERE scope = ? AND name = ?", (scope, name)
+            ).fetchone()
+        self.stats['loads'] += 1
+        if row is None:
+            return False
+        for field, value in json.loads(row[0]).items():
+            setattr(obj, field, value)
+        return True
+
+    def put(self, scope, name, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (scope, name, value, expires_at) VALUES (?, ?, ?, ?)",
+                (scope, name, json.dumps(value), now + ttl)
+            )
+            self._conn.execute("DELETE FROM state WHERE expires_at < ?", (now,))
+
+    def get(self, scope, name):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM state WHERE scope = ? AND name = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (scope, name, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def acquire_lease(self, key, ttl):
+        """Prend le bail `key` pour `ttl` secondes ; faux s'il est déjà tenu (par ce processus ou un autre)"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE leases.expires_at < ?",
+                (key, self.owner, now + ttl, now)
+            )
+            acquired = cursor.rowcount == 1
+        self.stats['leases_acquired' if acquired else 'leases_busy'] += 1
+        return acquired
+
+    def release_lease(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def snapshot(self):
+        with self._lock:
+            leases = self._conn.execute("SELECT COUNT(*) FROM leases WHERE expires_at >= ?", (time.time(),)).fetchone()[0]
+        return dict(self.stats, workers=WORKERS, pid=os.getpid(), active_leases=leases)
+
+
+def _open_shared_state():
+    if WORKERS <= 1 or not SHARED_STATE_PATH:
+        return None
+    try:
+        return SharedState(SHARED_STATE_PATH)
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ État partagé indisponible ({SHARED_STATE_PATH}), chaque worker garde le sien: {e}")
+        return None
+
+
+# None en mode mono-processus : tout l'état reste en mémoire
+shared_state = _open_shared_state()
+
+_executor = ThreadPoolExecutor(max_workers=SHARED_STATE_THREADS, thread_name_prefix="shared-state")
+
+
+async def run_shared(func, *args):
+    """Exécute une opération sur l'état partagé hors de la boucle asyncio.
+
+    L'attente du verrou SQLite d'un autre processus ne bloque ainsi que ce
+    thread ; en mono-processus, l'opération (en mémoire) est appelée directement.
+    """
+    if shared_state is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+def submit_shared(func, *args):
+    """Comme run_shared, sans attendre le résultat (chemins d'annulation)"""
+    if shared_state is None:
+        func(*args)
+    else:
+        _executor.submit(func, *args)
@@ -0,0 +1,60 @@
+import asyncio
+
+
+class _Call:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Regroupe les appels concurrents identiques : une seule exécution par clé,
+    dont le résultat (ou l'exception) est partagé par tous les appelants.
+
+    La tâche partagée n'est annulée que lorsque tous ses appelants ont abandonné.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self.stats = {'calls': 0, 'shared': 0}
+
+    async def do(self, key, factory):
+        self.stats['calls'] += 1
+        call = self._calls.get(key)
+        if call is not None and (call.task.cancelled() or call.task.cancelling()):
+            # Tâche abandonnée par ses appelants : on ne rejoint pas une annulation en cours
+            call = None
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(factory()))
+            call.task.add_done_callback(lambda task, key=key: self._done(key, task))
+        else:
+            self.stats['shared'] += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+                # Le prochain appelant relance une exécution au lieu d'hériter de l'annulation
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _done(self, key, task):
+        if self._calls.get(key) is not None and self._calls[key].task is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marque l'exception comme lue si tous les appelants sont partis
+            task.exception()
+
+    def in_flight(self):
+        return len(self._calls)
+
+    def snapshot(self):
+        return dict(self.stats, in_flight=self.in_flight())
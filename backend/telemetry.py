@@ -0,0 +1,221 @@
+import atexit
+import bisect
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+LOG_LEVEL = os.environ.get("LYRICS_LOG_LEVEL", "INFO").upper()
+# Nombre de traces récentes conservées pour /api/stats/traces
+TRACE_BUFFER = int(os.environ.get("LYRICS_TRACE_BUFFER", "100"))
+
+# Bornes (secondes) des histogrammes de latence
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+
+# --- Journalisation -----------------------------------------------------------
+
+_root_logger = logging.getLogger("lyricsnap")
+_listener = None
+
+
+def setup_logging(level=LOG_LEVEL):
+    """Journalisation non bloquante : les messages passent par une file, un thread les écrit"""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+    _root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _root_logger.setLevel(level)
+    _root_logger.propagate = False
+
+
+def get_logger(name):
+    return logging.getLogger(f"lyricsnap.{name}")
+
+
+# --- Métriques -----------------------------------------------------------------
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _labels_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), series['counts']):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _labels_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            lines.extend(f"{self.name}{_format_labels(key)} {value}" for key, value in sorted(self._values.items()))
+        return lines
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    parts = []
+    for name, value in key:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+# Durée de chaque étape du pipeline (stage = request, probe, oembed, provider, parse, http...)
+stage_seconds = Histogram("lyrics_stage_seconds", "Duree des etapes du pipeline d'extraction")
+# Événements comptés (hits/misses de cache, résultats des fournisseurs, statuts HTTP...)
+events_total = Counter("lyrics_events_total", "Evenements du pipeline d'extraction")
+
+# Fonctions appelées au rendu de /metrics : retournent des (nom, labels, valeur)
+_gauges = []
+
+
+def register_gauges(collect):
+    _gauges.append(collect)
+
+
+def render_metrics():
+    """Métriques au format texte Prometheus"""
+    lines = stage_seconds.render() + events_total.render()
+    for collect in _gauges:
+        for name, labels, value in collect():
+            lines.append(f"{name}{_format_labels(_labels_key(labels))} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+# --- Traces ----------------------------------------------------------------------
+
+class Trace:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.start = time.monotonic()
+        self.started_at = time.time()
+        self.duration = None
+        self.spans = []
+
+    def to_dict(self):
+        return {
+            'trace_id': self.id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 2) if self.duration is not None else None,
+            'spans': self.spans,
+        }
+
+
+_current_trace = contextvars.ContextVar("lyrics_trace", default=None)
+_current_span = contextvars.ContextVar("lyrics_span", default=None)
+_recent_traces = deque(maxlen=TRACE_BUFFER)
+
+
+@contextmanager
+def trace(name):
+    """Trace de la requête courante (toutes les étapes mesurées y sont rattachées)"""
+    current = Trace(name)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        current.duration = time.monotonic() - current.start
+        _current_trace.reset(token)
+        _recent_traces.append(current)
+
+
+@contextmanager
+def timed(stage, **labels):
+    """Mesure une étape : histogramme de latence et span dans la trace courante.
+
+    Retourne le dict des labels, complétable avant la fin de l'étape (route résolue...).
+    """
+    current = _current_trace.get()
+    parent = _current_span.get()
+    span_id = uuid.uuid4().hex[:8] if current is not None else None
+    token = _current_span.set(span_id) if current is not None else None
+    start = time.monotonic()
+    error = None
+    try:
+        yield labels
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.monotonic() - start
+        stage_seconds.observe(duration, stage=stage, **labels)
+        if current is not None:
+            _current_span.reset(token)
+            current.spans.append({
+                'span_id': span_id,
+                'parent_id': parent,
+                'stage': stage,
+                'labels': labels,
+                'offset_ms': round((start - current.start) * 1000, 2),
+                'duration_ms': round(duration * 1000, 2),
+                'error': error,
+            })
+
+
+def count(event, **labels):
+    events_total.inc(event=event, **labels)
+
+
+def server_timing(current):
+    """En-tête Server-Timing : durée cumulée par étape pour la trace"""
+    totals = {}
+    for span in current.spans:
+        totals[span['stage']] = totals.get(span['stage'], 0) + span['duration_ms']
+    return ', '.join(f"{stage};dur={duration:.1f}" for stage, duration in totals.items())
+
+
+def recent_traces(limit=20):
+    return [current.to_dict() for current in list(_recent_traces)[-limit:]]
@@ -0,0 +1,121 @@
+import os
+import re
+
+from lyrics_cache import MISSING, planner_cache, normalize_key
+from telemetry import get_logger
+
+logger = get_logger("variations")
+
+# Nombre maximal de variations interrogées par requête
+MAX_VARIATIONS = int(os.environ.get("LYRICS_MAX_VARIATIONS", "8"))
+# Durée de conservation de l'historique de succès par type de variation
+STATS_TTL = float(os.environ.get("LYRICS_PLANNER_TTL", str(90 * 24 * 3600)))
+
+_FEAT_SPLIT_RE = re.compile(r'\s+(?:feat\.?|ft\.?|featuring)\s+', re.IGNORECASE)
+_BRACKETS_RE = re.compile(r'\[.*?\]|\(.*?\)')
+_MIX_WORDS_RE = re.compile(r'\b(?:remix|mix|version|edit|remaster|remastered|cover)\b', re.IGNORECASE)
+_COVER_RE = re.compile(r'([^"]+)\s*["\']([^"\'\.]+)["\']')
+
+KINDS = (
+    'original', 'cover_original', 'cover_title', 'first_artist', 'feat_artist',
+    'main_artist', 'simple_title', 'no_mix_words', 'special', 'short_title', 'first_word'
+)
+
+
+class Variation(tuple):
+    """Couple (artiste, titre) annoté du type de variation qui l'a produit"""
+
+    def __new__(cls, artist, title, kind='original'):
+        variation = super().__new__(cls, (artist, title))
+        variation.kind = kind
+        return variation
+
+
+def create_search_variations(title, artist, original_title=None):
+    """Crée différentes variations de recherche pour améliorer les chances de trouver des paroles"""
+    variations = [Variation(artist, title)]
+
+    # Cover/remix : le titre YouTube cite parfois la chanson originale entre guillemets
+    cover_match = _COVER_RE.search(original_title or '')
+    if cover_match:
+        original_artist, original_song = cover_match.group(1).strip(), cover_match.group(2).strip()
+        logger.info(f"🎵 Détection possible de cover/remix: {original_artist} - {original_song}")
+        variations.insert(0, Variation(original_artist, original_song, 'cover_original'))
+        variations.append(Variation(artist, original_song, 'cover_title'))
+
+    # Variations pour les collaborations
+    if ',' in artist:
+        artists = [a.strip() for a in artist.split(',')]
+        variations.append(Variation(artists[0], title, 'first_artist'))  # Premier artiste seulement
+        if len(artists) > 1:
+            variations.append(Variation(f"{artists[0]} feat {artists[1]}", title, 'feat_artist'))
+
+    # Variations pour feat/ft
+    if any(word in artist.lower() for word in ['feat', 'ft.', 'featuring']):
+        variations.append(Variation(_FEAT_SPLIT_RE.split(artist)[0].strip(), title, 'main_artist'))
+
+    # Variations de titre simplifiées
+    simple_title = _BRACKETS_RE.sub('', title).strip()
+    if simple_title != title and simple_title:
+        variations.append(Variation(artist, simple_title, 'simple_title'))
+
+    # Titre sans mots courants
+    clean_title_words = _MIX_WORDS_RE.sub('', title).strip()
+    if clean_title_words != title and clean_title_words:
+        variations.append(Variation(artist, clean_title_words, 'no_mix_words'))
+
+    # Titres complexes connus
+    if 'still' in title.lower() and 'dre' in title.lower():
+        variations.append(Variation("Dr. Dre", "Still D.R.E.", 'special'))
+        variations.append(Variation(artist, "Still D.R.E.", 'special'))
+
+    # Premiers mots du titre si long, sinon premier mot
+    title_words = title.split()
+    if len(title_words) > 3:
+        variations.append(Variation(artist, ' '.join(title_words[:3]), 'short_title'))
+    elif len(title_words) > 1:
+        variations.append(Variation(artist, title_words[0], 'first_word'))
+
+    return variations
+
+
+def kind_stats(kind):
+    """Historique {"tries", "hits"} d'un type de variation"""
+    stats = planner_cache.get(kind)
+    return {"tries": 0, "hits": 0} if stats is MISSING or stats is None else stats
+
+
+def record_outcome(variation, found):
+    """Enregistre le résultat d'une variation (recherche ou cache)"""
+    kind = getattr(variation, 'kind', None)
+    if kind is None:
+        return
+    stats = kind_stats(kind)
+    planner_cache.set(kind, {"tries": stats["tries"] + 1, "hits": stats["hits"] + bool(found)}, STATS_TTL)
+
+
+def kind_score(kind):
+    # Lissage de Laplace : un type sans historique vaut 0.5
+    stats = kind_stats(kind)
+    return (stats["hits"] + 1) / (stats["tries"] + 2)
+
+
+def plan_variations(variations, limit=MAX_VARIATIONS):
+    """Déduplique, classe et élague les variations de recherche.
+
+    Les doublons (forme normalisée identique) et les couples incomplets sont retirés,
+    puis les variations sont triées par taux de succès de leur type (ordre d'origine
+    à score égal) et limitées à `limit`. Les requêtes déjà faites pour un fournisseur
+    sont écartées à l'exécution, par untried_providers.
+    """
+    unique = {}
+    for variation in variations:
+        if variation[0] and variation[1]:
+            unique.setdefault(normalize_key(*variation), variation)
+
+    ranked = sorted(unique.values(), key=lambda v: -kind_score(getattr(v, 'kind', 'original')))
+    return ranked[:limit]
+
+
+def planner_stats():
+    return {kind: dict(kind_stats(kind), score=round(kind_score(kind), 3)) for kind in KINDS}
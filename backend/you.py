@@ -1,17 +1,95 @@
-import yt_dlp
-import requests
-from bs4 import BeautifulSoup
+import httpx
 import re
+import os
+import asyncio
+import contextvars
 import urllib.parse
-import xml.etree.ElementTree as ET
 import json
+import threading
 import time
-from fastapi import FastAPI
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from extraction import (
+    parse_genius_page, parse_azlyrics_page, scrape_musixmatch_lyrics_from_response,
+    extract_google_result_urls, soup_tools
+)
+from compression import CompressionMiddleware, compact_lyrics, etag_matches, payload_etag
+from http_pool import http_deadline, http_get, close_pools, pool_stats
+from provider_health import get_health, rank_providers, health_stats
+from singleflight import SingleFlight
+from providers import (
+    PROVIDERS, REQUEST_BUDGET, register_provider, get_provider, request_budget, remaining_budget, split_budget,
+    provider_stats
+)
+from shared_state import WORKERS, run_shared, shared_state, submit_shared
+from jobs import JobQueue, QueueFullError
+from variations import Variation, create_search_variations, plan_variations, record_outcome, planner_stats
+from lyrics_index import lyrics_index
+from lyrics_store import lyrics_store
+from lyrics_cache import (
+    MISSING, video_cache, lyrics_cache, serp_cache, extract_video_id, normalize_key,
+    VIDEO_TTL, LYRICS_TTL, NEGATIVE_TTL, SERP_TTL, STALE_TTL
+)
+from refresher import REFRESH_INTERVAL, Refresher, needs_refresh
+from telemetry import get_logger, setup_logging, timed, trace, count, server_timing, render_metrics, recent_traces, register_gauges
+
+setup_logging()
+logger = get_logger("you")
+
+# Le parsing HTML (BeautifulSoup) est CPU-bound : il tourne dans un pool dédié
+# pour ne jamais bloquer la boucle asyncio
+PARSER_WORKERS = int(os.environ.get("LYRICS_PARSER_WORKERS", "4"))
+_parser_executor = ThreadPoolExecutor(max_workers=PARSER_WORKERS, thread_name_prefix="lyrics-parser")
+
+async def run_parser(func, *args):
+    """Exécute une fonction de parsing HTML dans le pool de parsing"""
+    loop = asyncio.get_running_loop()
+    with timed("parse", parser=func.__name__):
+        return await loop.run_in_executor(_parser_executor, func, *args)
 
-app = FastAPI(title="lycrissnap API", version="1.0.0")
+async def run_blocking(func, *args):
+    """Exécute un appel bloquant (yt-dlp) hors de la boucle asyncio"""
+    return await asyncio.to_thread(func, *args)
+
+# yt-dlp, bs4 et soupsieve sont importés au premier usage (démarrage à froid rapide en
+# serverless) ; pour un worker de longue durée, LYRICS_PRELOAD=1 les charge au démarrage
+# pour que la première requête ne paie pas ces imports
+PRELOAD = os.environ.get("LYRICS_PRELOAD", "0") == "1"
+
+def preload_dependencies():
+    """Importe yt-dlp et prépare les outils de parsing HTML (mode préchargé)"""
+    start = time.perf_counter()
+    import yt_dlp  # noqa: F401
+    soup_tools()
+    logger.info(f"📦 Dépendances préchargées en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+@asynccontextmanager
+async def lifespan(app):
+    if PRELOAD:
+        await run_blocking(preload_dependencies)
+    # Index de trigrammes construit en arrière-plan : la première recherche n'attend pas son chargement
+    index_load = asyncio.create_task(run_blocking(lyrics_index.load))
+    song_refresher.start()
+    video_refresher.start()
+    urls = warmup_urls()
+    warmup = asyncio.create_task(warm_up(urls)) if urls else None
+    store_gc = asyncio.create_task(collect_lyrics_blobs_periodically())
+    yield
+    store_gc.cancel()
+    index_load.cancel()
+    if warmup is not None:
+        warmup.cancel()
+    await song_refresher.close()
+    await video_refresher.close()
+    await extract_jobs.close()
+    await close_pools()
+
+app = FastAPI(title="lycrissnap API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,107 +97,242 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+# gzip (ou brotli s'il est installé) au-delà de LYRICS_COMPRESS_MIN_SIZE octets
+app.add_middleware(CompressionMiddleware)
+
+def route_template(request):
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Trace chaque appel d'API : spans par étape, en-têtes X-Trace-Id et Server-Timing"""
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    with trace(f"{request.method} {request.url.path}") as current:
+        with timed("request") as labels:
+            response = await call_next(request)
+            # Gabarit de la route (/api/extract/jobs/{job_id}) : une série par route, pas par URL
+            labels['route'] = route_template(request)
+    count("http_request", route=labels['route'], status=response.status_code)
+    response.headers["X-Trace-Id"] = current.id
+    response.headers["Server-Timing"] = server_timing(current)
+    return response
 
 # Modèles Pydantic
 class ExtractRequest(BaseModel):
     youtube_url: str
 
+class LyricsMetadata(BaseModel):
+    title: str = ""
+    artist: str = ""
+    thumbnail: Optional[str] = None
+
 class LyricsResponse(BaseModel):
     status: str
     lyrics: str
-    metadata: dict
+    metadata: LyricsMetadata
+
+class CompactLyricsResponse(BaseModel):
+    # Paroles reconstituées par "\n\n".join(blocks[i] for i in layout) : chaque refrain n'est envoyé qu'une fois
+    status: str
+    blocks: List[str]
+    layout: List[int]
+    metadata: LyricsMetadata
+
+class JobRequest(ExtractRequest):
+    # 0 = le plus urgent, 9 = le moins urgent
+    priority: int = 5
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    position: int = 0
+    result: Optional[LyricsResponse] = None
+    error: Optional[str] = None
+
+class BatchExtractRequest(BaseModel):
+    youtube_urls: List[str] = []
+    playlist_url: Optional[str] = None
+
+class BatchItem(LyricsResponse):
+    youtube_url: str
+
+class BatchLyricsResponse(BaseModel):
+    status: str
+    items: List[BatchItem]
+
+# Mentions parasites retirées des titres YouTube
+TITLE_NOISE = [
+    '(Official Music Video)', '(Official Video)', '(Music Video)',
+    '(Official)', '(Lyrics)', '[Official Video]', '[Music Video]',
+    '[Official]', '[Lyrics]', '| Official Video', '- Official Video',
+    '(Clip officiel)', '[Clip officiel]', '- Clip officiel',
+    '[Clip Officiel]', '(Clip Officiel)', 'prod by', 'prod. by',
+    'produced by', 'ft.', 'feat.', 'featuring',
+    '[One Take Video]', '(One Take Video)', '[One Take]', '(One Take)',
+    'Remix', 'Mix', 'Cover', 'Version'
+]
+
+# Une seule expression compilée à l'import : mentions parasites (les plus longues
+# d'abord), guillemets et contenu entre crochets/parenthèses, retirés en un passage
+_TITLE_NOISE_RE = re.compile(
+    '|'.join(re.escape(phrase) for phrase in sorted(set(TITLE_NOISE), key=len, reverse=True))
+    + r'|["\']|\[.*?\]|\(.*?\)',
+    re.IGNORECASE
+)
+
+# Découpage artiste/titre : les alternatives sont essayées dans l'ordre
+_ARTIST_TITLE_RE = re.compile(
+    r'^(?:(?P<comma1>.+?)\s*,\s*(?P<comma2>.+?)\s*[-–]\s*(?P<comma_title>.+)'  # "Artist1, Artist2 - Title"
+    r'|(?P<amp1>.+?)\s*&\s*(?P<amp2>.+?)\s*[-–]\s*(?P<amp_title>.+)'          # "Artist1 & Artist2 - Title"
+    r'|(?P<artist>.+?)\s*[-–]\s*(?P<title>.+))$'                                # "Artist - Title"
+)
 
 def clean_title(title):
     """Nettoie le titre pour une meilleure recherche"""
-    replacements = [
-        '(Official Music Video)', '(Official Video)', '(Music Video)',
-        '(Official)', '(Lyrics)', '[Official Video]', '[Music Video]',
-        '[Official]', '[Lyrics]', '| Official Video', '- Official Video',
-        '(Clip officiel)', '[Clip officiel]', '- Clip officiel',
-        '[Clip Officiel]', '(Clip Officiel)', 'prod by', 'prod. by',
-        'produced by', 'ft.', 'feat.', 'featuring',
-        '[One Take Video]', '(One Take Video)', '[One Take]', '(One Take)',
-        'Remix', 'Mix', 'Cover', 'Version'
-    ]
-    
-    cleaned = title
-    for replacement in replacements:
-        cleaned = re.sub(re.escape(replacement), '', cleaned, flags=re.IGNORECASE).strip()
-    
-    # Remove quotes and extra brackets/parentheses content
-    cleaned = re.sub(r'["\']', '', cleaned)
-    cleaned = re.sub(r'\[.*?\]', '', cleaned)
-    cleaned = re.sub(r'\(.*?\)', '', cleaned)
-    
-    # Remove extra whitespace and clean up
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-    
-    return cleaned
+    return ' '.join(_TITLE_NOISE_RE.sub('', title).split())
 
 def parse_artist_and_title(youtube_title, uploader):
     """Parse artist and title from YouTube metadata"""
     title = clean_title(youtube_title)
     
-    # Check for common collaboration patterns
-    patterns = [
-        r'^(.+?)\s*,\s*(.+?)\s*[-–]\s*(.+)$',  # "Artist1, Artist2 - Title"
-        r'^(.+?)\s*&\s*(.+?)\s*[-–]\s*(.+)$',  # "Artist1 & Artist2 - Title"
-        r'^(.+?)\s*[-–]\s*(.+)$',              # "Artist - Title"
-        r'^(.+?)\s*[\(\[]?ft\.?\s*(.+?)[\)\]]?\s*[-–]\s*(.+)$',  # "Artist ft. Artist2 - Title"
-    ]
-    
-    for pattern in patterns:
-        match = re.match(pattern, title, re.IGNORECASE)
-        if match:
-            groups = match.groups()
-            if len(groups) == 3:  # Artist1, Artist2, Title
-                artist = f"{groups[0].strip()}, {groups[1].strip()}"
-                song_title = groups[2].strip()
-                return artist, song_title
-            elif len(groups) == 2:  # Artist, Title
-                artist = groups[0].strip()
-                song_title = groups[1].strip()
-                return artist, song_title
+    match = _ARTIST_TITLE_RE.match(title)
+    if match:
+        groups = match.groupdict()
+        if groups['comma1'] is not None:
+            return f"{groups['comma1'].strip()}, {groups['comma2'].strip()}", groups['comma_title'].strip()
+        if groups['amp1'] is not None:
+            return f"{groups['amp1'].strip()}, {groups['amp2'].strip()}", groups['amp_title'].strip()
+        return groups['artist'].strip(), groups['title'].strip()
     
     # If no pattern matches, use uploader as artist and full title as song
     return uploader, title
 
-def get_metadata(youtube_url):
-    """Récupère les métadonnées de la vidéo YouTube"""
+# "oembed" interroge d'abord l'endpoint oEmbed de YouTube (titre, chaîne, miniature),
+# "ytdlp" passe directement par la sonde yt-dlp
+METADATA_MODE = os.environ.get("LYRICS_METADATA_MODE", "oembed")
+
+# Options yt-dlp réduites : on ne lit que le titre, la chaîne et la miniature,
+# inutile de résoudre les formats ou de télécharger le lecteur
+YTDLP_METADATA_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'noplaylist': True,
+    'extractor_args': {'youtube': {'skip': ['dash', 'hls', 'translated_subs'], 'player_skip': ['js']}},
+}
+
+# YoutubeDL n'est pas thread-safe : une instance par thread du pool de sondes, réutilisée
+# entre les requêtes. Le pool borne le nombre de sondes simultanées (et d'instances)
+PROBE_WORKERS = int(os.environ.get("LYRICS_PROBE_WORKERS", "4"))
+_probe_executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="yt-dlp-probe")
+_youtube_dl = threading.local()
+
+async def run_probe(func, *args):
+    """Exécute une sonde yt-dlp dans le pool de sondes (une instance YoutubeDL par thread)"""
+    return await asyncio.get_running_loop().run_in_executor(_probe_executor, func, *args)
+
+# Extractions lancées en parallèle pour un lot, et taille maximale d'un lot
+BATCH_CONCURRENCY = int(os.environ.get("LYRICS_BATCH_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.environ.get("LYRICS_BATCH_MAX_ITEMS", "200"))
+
+def expand_playlist(playlist_url):
+    """Liste les vidéos d'une playlist (extraction "flat" : aucune vidéo n'est sondée).
+
+    Retourne une liste de (url, titre YouTube, chaîne, miniature).
+    """
     ydl_opts = {
         'quiet': True,
         'no_warnings': True,
+        'skip_download': True,
+        'extract_flat': 'in_playlist',
+        'playlistend': BATCH_MAX_ITEMS,
     }
-    
+    import yt_dlp
+
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        try:
-            info = ydl.extract_info(youtube_url, download=False)
-            youtube_title = info.get('title', 'Unknown Title')
-            uploader = info.get('uploader', 'Unknown Artist')
-            artist, title = parse_artist_and_title(youtube_title, uploader)
-            return title, artist
-        except Exception as e:
-            print(f"❌ Erreur lors de l'extraction des métadonnées: {e}")
-            return "Unknown Title", "Unknown Artist"
+        info = ydl.extract_info(playlist_url, download=False)
+    
+    videos = []
+    for entry in info.get('entries') or []:
+        if not entry or not entry.get('id'):
+            continue
+        thumbnails = entry.get('thumbnails') or [{}]
+        videos.append((
+            f"https://www.youtube.com/watch?v={entry['id']}",
+            entry.get('title'),
+            entry.get('uploader') or entry.get('channel'),
+            thumbnails[-1].get('url', '')
+        ))
+    return videos
 
-def get_lyrics_ovh(artist, title):
+def probe_youtube_info(youtube_url):
+    """Sonde yt-dlp sans traitement des formats ; retourne (titre YouTube, chaîne, miniature)"""
+    with timed("probe"):
+        ydl = getattr(_youtube_dl, 'instance', None)
+        if ydl is None:
+            import yt_dlp
+            ydl = _youtube_dl.instance = yt_dlp.YoutubeDL(YTDLP_METADATA_OPTS)
+        info = ydl.extract_info(youtube_url, download=False, process=False)
+    
+    thumbnail = info.get('thumbnail')
+    if not thumbnail and info.get('thumbnails'):
+        # Les miniatures sont triées par qualité croissante
+        thumbnail = info['thumbnails'][-1].get('url', '')
+    return info.get('title', 'Unknown Title'), info.get('uploader', 'Unknown Artist'), thumbnail or ''
+
+async def fetch_oembed_info(youtube_url):
+    """Récupère titre, chaîne et miniature via oEmbed (une seule requête JSON légère)"""
+    try:
+        with timed("oembed"):
+            response = await http_get(
+                "https://www.youtube.com/oembed",
+                params={'url': youtube_url, 'format': 'json'},
+                timeout=5
+            )
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('title'):
+                return data['title'], data.get('author_name', 'Unknown Artist'), data.get('thumbnail_url', '')
+        else:
+            logger.warning(f"⚠️ oEmbed indisponible (HTTP {response.status_code}), passage à yt-dlp")
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning(f"⚠️ Erreur oEmbed: {e}")
+    
+    return None
+
+def get_metadata(youtube_url):
+    """Récupère les métadonnées de la vidéo YouTube"""
+    try:
+        youtube_title, uploader, _ = probe_youtube_info(youtube_url)
+        artist, title = parse_artist_and_title(youtube_title, uploader)
+        return title, artist
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de l'extraction des métadonnées: {e}")
+        return "Unknown Title", "Unknown Artist"
+
+async def provider_get(url, **kwargs):
+    """http_get des fournisseurs : un refus (403/429/5xx, disjoncteur ouvert, erreur réseau)
+    n'est pas un verdict, l'échec de la recherche devient non concluant (rien en cache négatif)"""
+    try:
+        response = await http_get(url, **kwargs)
+    except httpx.RequestError:
+        _mark_inconclusive()
+        raise
+    if response.status_code in (403, 429) or response.status_code >= 500:
+        _mark_inconclusive()
+    return response
+
+async def get_lyrics_ovh(artist, title):
     """Utilise l'API lyrics.ovh (gratuite)"""
     try:
-        print(f"🔍 Recherche sur Lyrics.ovh: {artist} - {title}")
+        logger.debug(f"🔍 Recherche sur Lyrics.ovh: {artist} - {title}")
         url = f"https://api.lyrics.ovh/v1/{urllib.parse.quote(artist)}/{urllib.parse.quote(title)}"
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'en-US,en;q=0.9,fr;q=0.8',
-            'Referer': 'https://lyrics.ovh/'
-        }
-        
-        # Add delay to avoid rate limiting
-        time.sleep(1)
-        
-        response = requests.get(url, headers=headers, timeout=15)
+        response = await provider_get(url, timeout=15)
         
         if response.status_code == 200:
             data = response.json()
@@ -127,243 +340,160 @@ def get_lyrics_ovh(artist, title):
             if lyrics and lyrics.strip() and not lyrics.startswith("Pardon"):
                 return lyrics.strip()
             else:
-                print("❌ Paroles vides ou non trouvées sur Lyrics.ovh")
+                logger.info("❌ Paroles vides ou non trouvées sur Lyrics.ovh")
         elif response.status_code == 404:
-            print("❌ Chanson non trouvée sur Lyrics.ovh")
+            logger.info("❌ Chanson non trouvée sur Lyrics.ovh")
         else:
-            print(f"⚠️ Erreur Lyrics.ovh (HTTP {response.status_code})")
+            logger.warning(f"⚠️ Erreur Lyrics.ovh (HTTP {response.status_code})")
     except Exception as e:
-        print(f"⚠️ Erreur Lyrics.ovh: {e}")
+        logger.warning(f"⚠️ Erreur Lyrics.ovh: {e}")
     
     return None
 
-def get_lyrics_musixmatch_search(artist, title):
+def musixmatch_slug(artist, title):
+    """Chemin de la page de paroles Musixmatch pour (artiste, titre)"""
+    artist_clean = re.sub(r'[^a-zA-Z0-9\s]', '', artist).lower().replace(' ', '-')
+    title_clean = re.sub(r'[^a-zA-Z0-9\s]', '', title).lower().replace(' ', '-')
+    return f"{artist_clean}/{title_clean}"
+
+async def get_lyrics_musixmatch_search(artist, title):
     """Recherche sur Musixmatch via scraping avec headers améliorés"""
     try:
-        print(f"🔍 Recherche sur Musixmatch: {artist} - {title}")
-        
-        # Use direct lyrics URL format instead of search
-        artist_clean = re.sub(r'[^a-zA-Z0-9\s]', '', artist).lower().replace(' ', '-')
-        title_clean = re.sub(r'[^a-zA-Z0-9\s]', '', title).lower().replace(' ', '-')
+        logger.debug(f"🔍 Recherche sur Musixmatch: {artist} - {title}")
         
         # Try direct URL format
-        direct_url = f"https://www.musixmatch.com/lyrics/{artist_clean}/{title_clean}"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Ch-Ua': '"Chromium";v="122", "Not(A:Brand";v="24", "Google Chrome";v="122"',
-            'Sec-Ch-Ua-Mobile': '?0',
-            'Sec-Ch-Ua-Platform': '"Windows"',
-            'Cache-Control': 'max-age=0'
-        }
-        
-        # Add session with longer delay
-        session = requests.Session()
-        session.headers.update(headers)
-        time.sleep(3)  # Longer delay
+        direct_url = f"https://www.musixmatch.com/lyrics/{musixmatch_slug(artist, title)}"
         
         try:
-            response = session.get(direct_url, timeout=20, allow_redirects=True)
+            response = await provider_get(direct_url, timeout=20)
             
             if response.status_code == 200:
-                return scrape_musixmatch_lyrics_from_response(response.text)
+                return await run_parser(scrape_musixmatch_lyrics_from_response, response.text)
             elif response.status_code == 403:
-                print("⚠️ Musixmatch bloque les requêtes automatisées (HTTP 403)")
+                logger.warning("⚠️ Musixmatch bloque les requêtes automatisées (HTTP 403)")
             elif response.status_code == 404:
-                print("❌ Chanson non trouvée sur Musixmatch (HTTP 404)")
+                logger.info("❌ Chanson non trouvée sur Musixmatch (HTTP 404)")
             else:
-                print(f"⚠️ Erreur Musixmatch (HTTP {response.status_code})")
-        except requests.exceptions.Timeout:
-            print("⚠️ Timeout Musixmatch - site trop lent")
-        except requests.exceptions.RequestException as e:
-            print(f"⚠️ Erreur de connexion Musixmatch: {e}")
+                logger.warning(f"⚠️ Erreur Musixmatch (HTTP {response.status_code})")
+        except httpx.TimeoutException:
+            logger.warning("⚠️ Timeout Musixmatch - site trop lent")
+        except httpx.RequestError as e:
+            logger.warning(f"⚠️ Erreur de connexion Musixmatch: {e}")
             
     except Exception as e:
-        print(f"⚠️ Erreur Musixmatch search: {e}")
+        logger.warning(f"⚠️ Erreur Musixmatch search: {e}")
     
     return None
 
-def scrape_musixmatch_lyrics_from_response(html_content):
-    """Scrape les paroles depuis le contenu HTML de Musixmatch"""
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Chercher les paroles dans différents conteneurs possibles
-        lyrics_selectors = [
-            'p[class*="lyrics__content"]',
-            'span[class*="lyrics__content"]', 
-            'div[class*="lyrics"]',
-            'p[data-test="lyrics-text"]',
-            'div[class*="mxm-lyrics"]',
-            'span[class*="lyrics__content__ok"]'
-        ]
-        
-        for selector in lyrics_selectors:
-            lyrics_elements = soup.select(selector)
-            if lyrics_elements:
-                lyrics = '\n'.join([elem.get_text().strip() for elem in lyrics_elements])
-                if lyrics and len(lyrics) > 50:  # Vérifier que ce sont de vraies paroles
-                    return lyrics
-        
-        # Try alternative approach - look for JSON-LD data
-        scripts = soup.find_all('script', type='application/ld+json')
-        for script in scripts:
-            try:
-                data = json.loads(script.string)
-                if 'lyrics' in data:
-                    return data['lyrics']
-            except:
-                continue
-        
-        print("❌ Structure de paroles Musixmatch non reconnue")
-    except Exception as e:
-        print(f"⚠️ Erreur scraping Musixmatch: {e}")
-    
-    return None
-
-def scrape_musixmatch_lyrics(url):
+async def scrape_musixmatch_lyrics(url):
     """Scrape les paroles d'une page Musixmatch"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
         
-        response = requests.get(url, headers=headers, timeout=15)
+        response = await provider_get(url, timeout=15)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Chercher les paroles dans différents conteneurs possibles
-            lyrics_selectors = [
-                'p[class*="lyrics__content"]',
-                'span[class*="lyrics__content"]',
-                'div[class*="lyrics"]',
-                'p[data-test="lyrics-text"]'
-            ]
-            
-            for selector in lyrics_selectors:
-                lyrics_elements = soup.select(selector)
-                if lyrics_elements:
-                    lyrics = '\n'.join([elem.get_text().strip() for elem in lyrics_elements])
-                    if lyrics and len(lyrics) > 50:  # Vérifier que ce sont de vraies paroles
-                        return lyrics
-            
-            print("❌ Structure de paroles Musixmatch non reconnue")
+            return await run_parser(scrape_musixmatch_lyrics_from_response, response.text)
         else:
-            print(f"⚠️ Erreur scraping Musixmatch (HTTP {response.status_code})")
+            logger.warning(f"⚠️ Erreur scraping Musixmatch (HTTP {response.status_code})")
     except Exception as e:
-        print(f"⚠️ Erreur scraping Musixmatch: {e}")
+        logger.warning(f"⚠️ Erreur scraping Musixmatch: {e}")
     
     return None
 
-def get_lyrics_azlyrics(artist, title):
+def azlyrics_urls(artist, title):
+    """URLs AZLyrics à essayer pour (artiste, titre), dans l'ordre"""
+    def clean_for_azlyrics(text):
+        # Remove common prefixes like "the"
+        if text.lower().startswith('the '):
+            text = text[4:]
+        # Remove everything that's not alphanumeric
+        return re.sub(r'[^a-zA-Z0-9]', '', text.lower())
+    
+    clean_artist = clean_for_azlyrics(artist)
+    clean_title = clean_for_azlyrics(title)
+    
+    # Try multiple URL variations
+    urls_to_try = [
+        f"https://www.azlyrics.com/lyrics/{clean_artist}/{clean_title}.html",
+        # Try with just first artist if collaboration
+        f"https://www.azlyrics.com/lyrics/{clean_for_azlyrics(artist.split(',')[0])}/{clean_title}.html" if ',' in artist else None,
+        # Try without common words
+        f"https://www.azlyrics.com/lyrics/{clean_artist}/{clean_for_azlyrics(title.split()[0])}.html" if len(title.split()) > 1 else None
+    ]
+    
+    # Filter out None values
+    return [url for url in urls_to_try if url]
+
+async def get_lyrics_azlyrics(artist, title):
     """Recherche sur AZLyrics avec amélioration de l'URL cleaning"""
     try:
-        print(f"🔍 Recherche sur AZLyrics: {artist} - {title}")
+        logger.debug(f"🔍 Recherche sur AZLyrics: {artist} - {title}")
         
-        # Nettoyer l'artiste et le titre pour AZLyrics plus intelligemment
-        def clean_for_azlyrics(text):
-            # Remove common prefixes like "the"
-            if text.lower().startswith('the '):
-                text = text[4:]
-            # Remove everything that's not alphanumeric
-            return re.sub(r'[^a-zA-Z0-9]', '', text.lower())
-        
-        clean_artist = clean_for_azlyrics(artist)
-        clean_title = clean_for_azlyrics(title)
-        
-        # Try multiple URL variations
-        urls_to_try = [
-            f"https://www.azlyrics.com/lyrics/{clean_artist}/{clean_title}.html",
-            # Try with just first artist if collaboration
-            f"https://www.azlyrics.com/lyrics/{clean_for_azlyrics(artist.split(',')[0])}/{clean_title}.html" if ',' in artist else None,
-            # Try without common words
-            f"https://www.azlyrics.com/lyrics/{clean_artist}/{clean_for_azlyrics(title.split()[0])}.html" if len(title.split()) > 1 else None
-        ]
-        
-        # Filter out None values
-        urls_to_try = [url for url in urls_to_try if url]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Referer': 'https://www.google.com/',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'cross-site',
-            'Cache-Control': 'max-age=0'
-        }
-        
-        session = requests.Session()
-        session.headers.update(headers)
-        
-        for url in urls_to_try:
+        for url in azlyrics_urls(artist, title):
             try:
-                print(f"🔗 Tentative URL: {url}")
-                time.sleep(3)  # Longer delay for AZLyrics
-                
-                response = session.get(url, timeout=20, allow_redirects=True)
+                logger.debug(f"🔗 Tentative URL: {url}")
+                response = await provider_get(url, timeout=20)
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Multiple selectors for AZLyrics content
-                    lyrics_selectors = [
-                        'div:not([class]):not([id])',  # Main lyrics div without class/id
-                        'div[class=""]',               # Empty class div
-                        'div.col-xs-12.col-lg-8.text-center div:not([class]):not([id])',
-                        'div.ringtone + div:not([class]):not([id])'
-                    ]
-                    
-                    for selector in lyrics_selectors:
-                        lyrics_divs = soup.select(selector)
-                        for lyrics_div in lyrics_divs:
-                            if lyrics_div and lyrics_div.get_text().strip():
-                                lyrics_text = lyrics_div.get_text().strip()
-                                # Check if this looks like actual lyrics (reasonable length, not navigation)
-                                if (len(lyrics_text) > 100 and 
-                                    'Submit Corrections' not in lyrics_text and
-                                    'Thanks to' not in lyrics_text[:50]):
-                                    return lyrics_text
+                    lyrics_text = await run_parser(parse_azlyrics_page, response.text)
+                    if lyrics_text:
+                        return lyrics_text
                     
-                    print(f"❌ Paroles non trouvées à l'URL: {url}")
+                    logger.info(f"❌ Paroles non trouvées à l'URL: {url}")
                 elif response.status_code == 404:
-                    print(f"❌ Page non trouvée (404): {url}")
+                    logger.info(f"❌ Page non trouvée (404): {url}")
                 elif response.status_code == 403:
-                    print(f"⚠️ Accès refusé par AZLyrics (403): {url}")
+                    logger.warning(f"⚠️ Accès refusé par AZLyrics (403): {url}")
                 else:
-                    print(f"⚠️ Erreur HTTP {response.status_code}: {url}")
+                    logger.warning(f"⚠️ Erreur HTTP {response.status_code}: {url}")
                     
-            except requests.exceptions.Timeout:
-                print(f"⚠️ Timeout pour: {url}")
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ Erreur de connexion pour {url}: {e}")
+            except httpx.TimeoutException:
+                logger.warning(f"⚠️ Timeout pour: {url}")
+            except httpx.RequestError as e:
+                logger.warning(f"⚠️ Erreur de connexion pour {url}: {e}")
             except Exception as e:
-                print(f"⚠️ Erreur inattendue pour {url}: {e}")
+                logger.warning(f"⚠️ Erreur inattendue pour {url}: {e}")
                 
     except Exception as e:
-        print(f"⚠️ Erreur AZLyrics: {e}")
+        logger.warning(f"⚠️ Erreur AZLyrics: {e}")
     
     return None
 
-def search_google_lyrics(artist, title):
+# Liens candidats d'une page de résultats scrapés en parallèle (le premier valide gagne)
+GOOGLE_CANDIDATES = int(os.environ.get("LYRICS_GOOGLE_CANDIDATES", "4"))
+
+async def scrape_candidate(site, url):
+    """Scrape une page de paroles trouvée via Google selon son site"""
+    logger.debug(f"🔗 Lien prometteur trouvé: {url[:80]}...")
+    lyrics = await CANDIDATE_SCRAPERS[site](url)
+    return lyrics if lyrics and len(lyrics) > 100 else None
+
+async def google_candidates(query, index):
+    """Liens candidats d'une requête Google (depuis le cache si possible)"""
+    candidates = serp_cache.get(query)
+    if candidates is not MISSING:
+        logger.info(f"⚡ Résultats Google en cache: {query[:50]}...")
+        return candidates
+    
+    logger.debug(f"📱 Essai Google {index}/4: {query[:50]}...")
+    search_url = f"https://www.google.com/search?q={urllib.parse.quote(query)}"
+    response = await provider_get(search_url, timeout=15)
+    
+    if response.status_code == 200:
+        candidates = await run_parser(extract_google_result_urls, response.text)
+        # Une page sans lien exploitable (consentement, captcha...) est gardée moins longtemps
+        serp_cache.set(query, candidates, SERP_TTL if candidates else min(SERP_TTL, NEGATIVE_TTL))
+        return candidates
+    elif response.status_code == 429:
+        logger.warning("⚠️ Google rate limiting - le limiteur ralentit les prochaines requêtes")
+    else:
+        logger.warning(f"⚠️ Google search error (HTTP {response.status_code})")
+    return []
+
+async def search_google_lyrics(artist, title):
     """Recherche Google pour trouver des sites de paroles avec meilleure logique"""
     try:
-        print(f"🔍 Recherche Google: {artist} - {title} lyrics")
+        logger.debug(f"🔍 Recherche Google: {artist} - {title} lyrics")
         
         # Recherche Google avec des sites spécifiques - plus ciblée
         queries = [
@@ -373,245 +503,548 @@ def search_google_lyrics(artist, title):
             f'{artist} {title} song lyrics'
         ]
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none'
-        }
-        
-        session = requests.Session()
-        session.headers.update(headers)
-        
+        tried = set()
         for i, query in enumerate(queries):
             try:
-                print(f"📱 Essai Google {i+1}/4: {query[:50]}...")
-                
-                search_url = f"https://www.google.com/search?q={urllib.parse.quote(query)}"
-                time.sleep(2)  # Délai respectueux
+                candidates = [(site, url) for site, url in await google_candidates(query, i + 1) if url not in tried]
+                candidates = candidates[:GOOGLE_CANDIDATES]
+                if not candidates:
+                    continue
+                tried.update(url for _, url in candidates)
                 
-                response = session.get(search_url, timeout=15)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Chercher les liens dans les résultats avec plusieurs sélecteurs
-                    link_selectors = [
-                        'a[href*="/url?q="]',
-                        'h3 a',
-                        'div.yuRUbf a'
-                    ]
-                    
-                    found_links = []
-                    for selector in link_selectors:
-                        links = soup.select(selector)
-                        found_links.extend(links)
-                    
-                    for link in found_links:
-                        href = link.get('href', '')
-                        if '/url?q=' in href:
-                            try:
-                                actual_url = href.split('/url?q=')[1].split('&')[0]
-                                actual_url = urllib.parse.unquote(actual_url)
-                                
-                                # Filtrer les sites de paroles connus
-                                target_sites = [
-                                    'genius.com/lyrics',
-                                    'azlyrics.com/lyrics',
-                                    'musixmatch.com/lyrics',
-                                    'lyrics.com',
-                                    'metrolyrics.com'
-                                ]
-                                
-                                if any(site in actual_url.lower() for site in target_sites):
-                                    print(f"🔗 Lien prometteur trouvé: {actual_url[:80]}...")
-                                    
-                                    # Essayer de scraper selon le site
-                                    if 'genius.com' in actual_url:
-                                        lyrics = scrape_genius_page(actual_url)
-                                        if lyrics and len(lyrics) > 100:
-                                            return lyrics
-                                    elif 'azlyrics.com' in actual_url:
-                                        lyrics = scrape_azlyrics_direct(actual_url)
-                                        if lyrics and len(lyrics) > 100:
-                                            return lyrics
-                                    elif 'musixmatch.com' in actual_url:
-                                        lyrics = scrape_musixmatch_lyrics(actual_url)
-                                        if lyrics and len(lyrics) > 100:
-                                            return lyrics
-                            except Exception as url_error:
-                                print(f"⚠️ Erreur traitement URL: {url_error}")
-                                continue
-                
-                elif response.status_code == 429:
-                    print("⚠️ Google rate limiting - attente plus longue")
-                    time.sleep(5)
-                else:
-                    print(f"⚠️ Google search error (HTTP {response.status_code})")
+                _, lyrics = await race_attempts(
+                    [(url, lambda site=site, url=url: scrape_candidate(site, url)) for site, url in candidates],
+                    priority_window=0
+                )
+                if lyrics:
+                    return lyrics
                     
-            except requests.exceptions.Timeout:
-                print(f"⚠️ Timeout Google search query {i+1}")
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ Erreur connexion Google query {i+1}: {e}")
+            except httpx.TimeoutException:
+                logger.warning(f"⚠️ Timeout Google search query {i+1}")
+            except httpx.RequestError as e:
+                logger.warning(f"⚠️ Erreur connexion Google query {i+1}: {e}")
             except Exception as e:
-                print(f"⚠️ Erreur Google query {i+1}: {e}")
+                logger.warning(f"⚠️ Erreur Google query {i+1}: {e}")
                 continue
     
     except Exception as e:
-        print(f"⚠️ Erreur générale Google search: {e}")
+        logger.warning(f"⚠️ Erreur générale Google search: {e}")
     
-    print("❌ Aucun résultat exploitable trouvé via Google")
+    logger.info("❌ Aucun résultat exploitable trouvé via Google")
     return None
 
-def scrape_genius_page(url):
+async def scrape_genius_page(url):
     """Scrape une page Genius directement"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
+        response = await provider_get(url, timeout=15)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Chercher les différents conteneurs de paroles sur Genius
-            lyrics_selectors = [
-                'div[class*="Lyrics__Container"]',
-                'div[data-lyrics-container="true"]',
-                'div[class*="lyrics"]'
-            ]
-            
-            for selector in lyrics_selectors:
-                lyrics_containers = soup.select(selector)
-                if lyrics_containers:
-                    lyrics_text = []
-                    for container in lyrics_containers:
-                        # Extraire le texte en préservant les sauts de ligne
-                        for br in container.find_all('br'):
-                            br.replace_with('\n')
-                        lyrics_text.append(container.get_text())
-                    
-                    if lyrics_text:
-                        combined_lyrics = '\n'.join(lyrics_text).strip()
-                        if len(combined_lyrics) > 50:
-                            return combined_lyrics
+            lyrics = await run_parser(parse_genius_page, response.text)
+            if lyrics:
+                return lyrics
             
-            print("❌ Structure de paroles Genius non reconnue")
+            logger.info("❌ Structure de paroles Genius non reconnue")
         else:
-            print(f"⚠️ Erreur scraping Genius (HTTP {response.status_code})")
+            logger.warning(f"⚠️ Erreur scraping Genius (HTTP {response.status_code})")
     except Exception as e:
-        print(f"⚠️ Erreur scraping Genius: {e}")
+        logger.warning(f"⚠️ Erreur scraping Genius: {e}")
     
     return None
 
-def scrape_azlyrics_direct(url):
+async def scrape_azlyrics_direct(url):
     """Scrape une page AZLyrics directement depuis une URL donnée"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Referer': 'https://www.google.com/',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'max-age=0'
-        }
-        
-        time.sleep(3)  # Respectful delay
-        response = requests.get(url, headers=headers, timeout=20)
+        response = await provider_get(url, timeout=20)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Multiple selectors for AZLyrics content
-            lyrics_selectors = [
-                'div:not([class]):not([id])',  # Main lyrics div without class/id
-                'div[class=""]',               # Empty class div
-                'div.col-xs-12.col-lg-8.text-center div:not([class]):not([id])',
-                'div.ringtone + div:not([class]):not([id])'
-            ]
-            
-            for selector in lyrics_selectors:
-                lyrics_divs = soup.select(selector)
-                for lyrics_div in lyrics_divs:
-                    if lyrics_div and lyrics_div.get_text().strip():
-                        lyrics_text = lyrics_div.get_text().strip()
-                        # Check if this looks like actual lyrics
-                        if (len(lyrics_text) > 100 and 
-                            'Submit Corrections' not in lyrics_text and
-                            'Thanks to' not in lyrics_text[:50] and
-                            'Sorry' not in lyrics_text[:20]):
-                            return lyrics_text
+            lyrics_text = await run_parser(parse_azlyrics_page, response.text)
+            if lyrics_text:
+                return lyrics_text
             
-            print(f"❌ Paroles non trouvées à l'URL: {url}")
+            logger.info(f"❌ Paroles non trouvées à l'URL: {url}")
         else:
-            print(f"⚠️ Erreur scraping AZLyrics direct (HTTP {response.status_code})")
+            logger.warning(f"⚠️ Erreur scraping AZLyrics direct (HTTP {response.status_code})")
     except Exception as e:
-        print(f"⚠️ Erreur scraping AZLyrics direct: {e}")
+        logger.warning(f"⚠️ Erreur scraping AZLyrics direct: {e}")
     
     return None
 
 def get_video_info_youtube(youtube_url):
     """Récupère les informations détaillées de la vidéo YouTube incluant la miniature"""
-    ydl_opts = {
-        'quiet': True,
-        'no_warnings': True,
-    }
+    try:
+        youtube_title, uploader, thumbnail = probe_youtube_info(youtube_url)
+        artist, title = parse_artist_and_title(youtube_title, uploader)
+        return title, artist, thumbnail
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de l'extraction des métadonnées: {e}")
+        return "Unknown Title", "Unknown Artist", ""
+
+# Scrapers des pages trouvées via Google, par site (voir extraction.extract_google_result_urls)
+CANDIDATE_SCRAPERS = {
+    'genius': scrape_genius_page,
+    'azlyrics': scrape_azlyrics_direct,
+    'musixmatch': scrape_musixmatch_lyrics,
+}
+
+# Fournisseurs de paroles, dans l'ordre de priorité par défaut.
+# cost : requêtes sortantes par appel, timeout : durée maximale d'un appel,
+# concurrency : appels simultanés autorisés, key : requête réellement envoyée
+register_provider('ovh', 'Lyrics.ovh', get_lyrics_ovh, cost=1, timeout=8, concurrency=16)
+register_provider('musixmatch', 'Musixmatch', get_lyrics_musixmatch_search, cost=2, timeout=10, concurrency=4,
+                  key=musixmatch_slug)
+register_provider('azlyrics', 'AZLyrics', get_lyrics_azlyrics, cost=3, timeout=12, concurrency=4,
+                  key=lambda artist, title: '|'.join(azlyrics_urls(artist, title)))
+register_provider('google', 'Recherche Google', search_google_lyrics, cost=8, timeout=20, concurrency=2)
+
+# "race" lance les fournisseurs en parallèle, "sequential" garde l'ancien comportement
+SEARCH_MODE = os.environ.get("LYRICS_SEARCH_MODE", "race")
+# Ordre de priorité des fournisseurs (ex: "ovh,musixmatch,azlyrics,google")
+PROVIDER_PRIORITY = [
+    name.strip() for name in os.environ.get("LYRICS_PROVIDER_PRIORITY", ",".join(PROVIDERS)).split(",")
+    if name.strip() in PROVIDERS
+]
+# Classement des fournisseurs selon leur taux de succès et leur latence récents
+HEALTH_ROUTING = os.environ.get("LYRICS_HEALTH_ROUTING", "1") == "1"
+# Nombre de variations lancées en même temps en mode race
+RACE_VARIATIONS = int(os.environ.get("LYRICS_RACE_VARIATIONS", "3"))
+# Pendant cette fenêtre (secondes), un résultat n'est retenu que si aucune
+# tentative plus prioritaire n'est encore en cours
+PRIORITY_WINDOW = float(os.environ.get("LYRICS_PRIORITY_WINDOW", "1.5"))
+
+def active_providers():
+    """Fournisseurs à interroger, dans l'ordre (disjoncteurs ouverts exclus)"""
+    available = rank_providers(PROVIDER_PRIORITY)
+    if HEALTH_ROUTING:
+        return available
+    return [name for name in PROVIDER_PRIORITY if name in available]
+
+# Regroupement des requêtes identiques simultanées : par vidéo pour /api/extract,
+# par fournisseur et (artiste, titre) normalisés pour les appels aux fournisseurs
+extract_flight = SingleFlight("extract")
+provider_flight = SingleFlight("provider")
+
+# File d'événements de progression de la requête en cours (réponses en streaming)
+_progress_queue = contextvars.ContextVar("lyrics_progress_queue", default=None)
+# Résultat de la recherche en cours : un timeout rend un échec non concluant ;
+# "missed" / "cancelled" : (artiste, titre) dont une tentative a fini sans paroles / a été annulée
+_search_outcome = contextvars.ContextVar("lyrics_search_outcome", default=None)
+
+def _mark_inconclusive():
+    outcome = _search_outcome.get()
+    if outcome is not None:
+        outcome["inconclusive"] = True
+
+def _mark_attempt(result, artist, title):
+    outcome = _search_outcome.get()
+    if outcome is not None:
+        outcome[result].add((artist, title))
+
+def emit_progress(event, **data):
+    """Publie un événement de progression si la requête courante est en streaming"""
+    queue = _progress_queue.get()
+    if queue is not None:
+        queue.put_nowait({"event": event, **data})
+
+async def call_provider(name, artist, title, share=None):
+    """Appelle un fournisseur ; les appels identiques simultanés partagent le même résultat.
+
+    L'appel est borné par le timeout du fournisseur, `share` (part du budget allouée
+    à cette tentative) et le budget restant de la requête.
+    """
+    provider = get_provider(name)
+    key = f"{name}|{provider.key(artist, title)}"
+    attempt = {"provider": name, "artist": artist, "title": title}
+    timeout = provider.attempt_timeout(share)
+    emit_progress("attempt", status="started", **attempt)
+    try:
+        lyrics = await provider_flight.do(key, lambda: _call_provider(name, artist, title, timeout))
+    except asyncio.CancelledError:
+        count("provider_attempt", provider=name, result="cancelled")
+        emit_progress("attempt", status="cancelled", **attempt)
+        _mark_attempt("cancelled", artist, title)
+        raise
+    except asyncio.TimeoutError:
+        count("provider_attempt", provider=name, result="timeout")
+        logger.warning(f"⏱️ {provider.label} n'a pas répondu en {timeout:.1f}s")
+        emit_progress("attempt", status="timeout", **attempt)
+        _mark_inconclusive()
+        return None
+    except Exception:
+        count("provider_attempt", provider=name, result="error")
+        emit_progress("attempt", status="error", **attempt)
+        _mark_inconclusive()
+        raise
+    count("provider_attempt", provider=name, result="found" if lyrics else "not_found")
+    emit_progress("attempt", status="found" if lyrics else "not_found", **attempt)
+    if not lyrics:
+        _mark_attempt("missed", artist, title)
+    return lyrics
+
+async def _call_provider(name, artist, title, timeout):
+    """Appelle un fournisseur et enregistre son résultat et sa latence"""
+    provider = get_provider(name)
+    start = time.monotonic()
+    try:
+        with timed("provider", provider=name):
+            async with provider.semaphore:
+                with http_deadline(timeout):
+                    lyrics = await asyncio.wait_for(provider.fetch(artist, title), timeout)
+    except Exception:
+        get_health(name).record(False, time.monotonic() - start)
+        raise
+    # Une tentative annulée (perdue en mode race) n'est pas comptabilisée
+    get_health(name).record(lyrics, time.monotonic() - start)
+    return lyrics
+
+async def race_attempts(attempts, priority_window=PRIORITY_WINDOW):
+    """Lance toutes les tentatives en parallèle et retourne (index, résultat) du premier résultat valide.
+
+    `attempts` est une liste de (label, fabrique de coroutine) triée par priorité.
+    Pendant `priority_window`, un résultat attend les tentatives plus prioritaires ;
+    ensuite le meilleur résultat disponible gagne. Les tentatives restantes sont annulées.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + priority_window
+    tasks = [asyncio.ensure_future(factory()) for _, factory in attempts]
+    rank = {task: i for i, task in enumerate(tasks)}
+    results = {}
+    pending = set(tasks)
     
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        try:
-            info = ydl.extract_info(youtube_url, download=False)
-            youtube_title = info.get('title', 'Unknown Title')
-            uploader = info.get('uploader', 'Unknown Artist')
-            thumbnail = info.get('thumbnail', '')
+    try:
+        while pending:
+            timeout = max(0, deadline - loop.time()) if results else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
             
-            artist, title = parse_artist_and_title(youtube_title, uploader)
-            return title, artist, thumbnail
+            for task in done:
+                # Tentative annulée (single-flight partagé abandonné...) : traitée comme un échec
+                if task.cancelled():
+                    continue
+                if task.exception():
+                    logger.warning(f"⚠️ Erreur {attempts[rank[task]][0]}: {task.exception()}")
+                    continue
+                lyrics = task.result()
+                if lyrics and lyrics.strip():
+                    results[rank[task]] = lyrics
+            
+            if results:
+                best = min(results)
+                if loop.time() >= deadline or all(rank[task] > best for task in pending):
+                    logger.info(f"🏁 Paroles trouvées via {attempts[best][0]}")
+                    return best, results[best]
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    return None, None
+
+def untried_providers(providers, variation, tried):
+    """Fournisseurs pour lesquels la variation envoie une requête pas encore tentée"""
+    untried = []
+    for name in providers:
+        key = (name, get_provider(name).key(*variation))
+        if key not in tried:
+            tried.add(key)
+            untried.append(name)
+    return untried
+
+async def search_lyrics_race(search_variations):
+    """Interroge les fournisseurs en parallèle, par vagues de variations.
+    
+    Retourne (paroles, fournisseur, variation) ou None.
+    """
+    tried = set()
+    for start in range(0, len(search_variations), RACE_VARIATIONS):
+        wave = search_variations[start:start + RACE_VARIATIONS]
+        logger.debug(f"🎯 Variations de recherche {start+1}-{start+len(wave)} en parallèle")
+        
+        providers = active_providers()
+        if len(providers) < len(PROVIDER_PRIORITY):
+            # Fournisseurs écartés (disjoncteur ouvert) : un échec ne prouve pas l'absence de paroles
+            _mark_inconclusive()
+        if not providers:
+            logger.warning("⚠️ Tous les fournisseurs sont temporairement désactivés")
+            return None
+        
+        attempts = []
+        sources = []
+        for variation in wave:
+            search_artist, search_title = variation
+            for name in untried_providers(providers, variation, tried):
+                attempts.append((
+                    f"{get_provider(name).label} ({search_artist} - {search_title})",
+                    lambda name=name, a=search_artist, t=search_title: call_provider(name, a, t)
+                ))
+                sources.append((name, variation))
+        
+        if not attempts:
+            continue
+        index, lyrics = await race_attempts(attempts)
+        if lyrics:
+            return (lyrics,) + sources[index]
+    
+    return None
+
+async def search_lyrics_sequential(search_variations):
+    """Essaie chaque variation sur chaque fournisseur, l'un après l'autre.
+    
+    Retourne (paroles, fournisseur, variation) ou None.
+    """
+    tried = set()
+    for i, variation in enumerate(search_variations):
+        search_artist, search_title = variation
+        logger.debug(f"🎯 Variation de recherche {i+1}: {search_artist} - {search_title}")
+        
+        available = active_providers()
+        if len(available) < len(PROVIDER_PRIORITY):
+            _mark_inconclusive()
+        providers = untried_providers(available, variation, tried)
+        for j, name in enumerate(providers):
+            # Le budget restant est partagé entre les tentatives encore à faire
+            share = split_budget(providers[j:])[name]
+            logger.debug(f"🔄 Tentative {j+1}/{len(providers)}: {get_provider(name).label}")
+            lyrics = await call_provider(name, search_artist, search_title, share)
+            if lyrics:
+                return lyrics, name, variation
+    
+    return None
+
+def cache_entry(lyrics, provider):
+    """Entrée du cache de paroles : le texte est stocké une seule fois dans lyrics_store"""
+    return {"lyrics_ref": lyrics_store.put(lyrics), "provider": provider, "fetched_at": time.time()}
+
+def is_stale(fetched_at, ttl):
+    # Les entrées antérieures à l'horodatage sont considérées comme fraîches
+    return fetched_at is not None and time.time() - fetched_at > ttl
+
+def lyrics_stale(cached):
+    return cached is not MISSING and bool(cached) and is_stale(cached.get('fetched_at'), LYRICS_TTL)
+
+def cached_lyrics(cached):
+    """Paroles d'une entrée du cache (None si absente, négative ou texte disparu)"""
+    if cached is MISSING or not cached:
+        return None
+    if 'lyrics' in cached:
+        return cached['lyrics']
+    return lyrics_store.get(cached['lyrics_ref'])
+
+# Intervalle (secondes) entre deux collectes des textes de paroles qui ne sont plus référencés
+STORE_GC_INTERVAL = float(os.environ.get("LYRICS_STORE_GC_INTERVAL", "3600"))
+
+def collect_lyrics_blobs():
+    """Supprime de lyrics_store les textes que ni le cache de paroles ni l'index ne référencent"""
+    live = lyrics_index.lyrics_refs()
+    live.update(entry['lyrics_ref'] for entry in lyrics_cache.values() if entry and 'lyrics_ref' in entry)
+    return lyrics_store.collect(live)
+
+async def collect_lyrics_blobs_periodically():
+    while True:
+        await asyncio.sleep(STORE_GC_INTERVAL)
+        # Multi-processus : un seul worker collecte (le cache disque est commun)
+        if shared_state is not None and not await run_shared(shared_state.acquire_lease, "store_gc", STORE_GC_INTERVAL):
+            continue
+        try:
+            await run_blocking(collect_lyrics_blobs)
         except Exception as e:
-            print(f"❌ Erreur lors de l'extraction des métadonnées: {e}")
-            return "Unknown Title", "Unknown Artist", ""
-
-def create_search_variations(title, artist):
-    """Crée différentes variations de recherche pour améliorer les chances de trouver des paroles"""
-    variations = [(artist, title)]
-    
-    # Variations pour les collaborations
-    if ',' in artist:
-        artists = [a.strip() for a in artist.split(',')]
-        variations.append((artists[0], title))  # Premier artiste seulement
-        if len(artists) > 1:
-            variations.append((f"{artists[0]} feat {artists[1]}", title))
-    
-    # Variations pour feat/ft
-    if any(word in artist.lower() for word in ['feat', 'ft.', 'featuring']):
-        main_artist = re.split(r'\s+(?:feat\.?|ft\.?|featuring)\s+', artist, flags=re.IGNORECASE)[0].strip()
-        variations.append((main_artist, title))
-    
-    # Variations de titre simplifiées
-    simple_title = re.sub(r'\[.*?\]|\(.*?\)', '', title).strip()
-    if simple_title != title and simple_title:
-        variations.append((artist, simple_title))
-    
-    # Titre sans mots courants
-    clean_title_words = re.sub(r'\b(?:remix|mix|version|edit|remaster|remastered|cover)\b', '', title, flags=re.IGNORECASE).strip()
-    if clean_title_words != title and clean_title_words:
-        variations.append((artist, clean_title_words))
-    
-    # Premiers mots du titre si long
-    title_words = title.split()
-    if len(title_words) > 3:
-        short_title = ' '.join(title_words[:3])
-        variations.append((artist, short_title))
-    
-    return variations
+            logger.warning(f"⚠️ Échec de la collecte des textes de paroles: {e}")
+
+# Intervalle (secondes) de consultation du cache partagé pendant la recherche d'un autre worker
+PEER_SEARCH_POLL = float(os.environ.get("LYRICS_PEER_SEARCH_POLL", "0.25"))
+
+# Variations cherchées dans l'index local (artiste et titre complets)
+INDEX_KINDS = ('original', 'cover_original')
+
+async def find_lyrics(search_variations):
+    """Cherche les paroles (cache puis fournisseurs, selon LYRICS_SEARCH_MODE)"""
+    if not search_variations:
+        return None
+    
+    # Popularité de la chanson (avec de quoi relancer sa recherche en arrière-plan)
+    song_key = normalize_key(*search_variations[0])
+    song_payload = [(*variation, getattr(variation, 'kind', 'original')) for variation in search_variations]
+    song_refresher.track(song_key, song_payload)
+    
+    # Consulter le cache ; les variations connues comme introuvables sont ignorées
+    remaining = []
+    for variation in search_variations:
+        cached = lyrics_cache.get(normalize_key(*variation))
+        if lyrics_stale(cached):
+            # Périmée : servie tout de suite, rafraîchie en arrière-plan (sauf si un autre worker l'a déjà fait)
+            cached = lyrics_cache.reload(normalize_key(*variation))
+            if lyrics_stale(cached):
+                count("cache", cache="lyrics", result="stale")
+                song_refresher.schedule(song_key, song_payload)
+        lyrics = cached_lyrics(cached)
+        count("cache", cache="lyrics", result="hit" if lyrics else "negative" if cached is None else "miss")
+        if lyrics:
+            logger.info(f"⚡ Paroles en cache ({cached['provider']}): {variation[0]} - {variation[1]}")
+            emit_progress("cache", status="hit", provider=cached['provider'], artist=variation[0], title=variation[1])
+            record_outcome(variation, True)
+            return lyrics
+        if cached is not None:
+            remaining.append(variation)
+    
+    # Index local : correspondance floue sur (artiste, titre) avant tout appel réseau.
+    # Seules les variations complètes sont cherchées : un titre tronqué (short_title,
+    # first_word...) correspondrait à une autre chanson du même artiste
+    for variation in search_variations:
+        if getattr(variation, 'kind', 'original') not in INDEX_KINDS:
+            continue
+        with timed("index"):
+            match = await run_blocking(lyrics_index.lookup, *variation)
+        count("cache", cache="index", result="hit" if match else "miss")
+        if match:
+            logger.info(f"📚 Paroles dans l'index local ({match['artist']} - {match['title']}, score {match['score']})")
+            emit_progress("index", status="hit", provider=match['provider'], artist=match['artist'],
+                          title=match['title'], score=match['score'])
+            # Une correspondance approchée n'est pas promue dans le cache exact (clé de la variation)
+            if match['score'] >= 1.0:
+                lyrics_cache.set(normalize_key(*variation), cache_entry(match['lyrics'], match['provider']),
+                                 LYRICS_TTL + STALE_TTL)
+            record_outcome(variation, True)
+            return match['lyrics']
+    
+    if not remaining:
+        logger.info("⚡ Chanson introuvable (résultat négatif en cache)")
+        emit_progress("cache", status="negative")
+        return None
+    
+    # Multi-processus : un seul worker cherche une chanson donnée, les autres attendent son résultat
+    search_key = normalize_key(*remaining[0])
+    if shared_state is not None:
+        try:
+            cached = await asyncio.wait_for(wait_for_peer_search(search_key), remaining_budget())
+        except asyncio.TimeoutError:
+            count("budget_exhausted", stage="peer_search")
+            logger.warning("⏱️ Budget de latence épuisé en attendant un autre worker")
+            emit_progress("budget", status="exhausted")
+            return None
+        if cached is not MISSING:
+            logger.info("⚡ Résultat obtenu par un autre worker")
+            emit_progress("cache", status="hit" if cached else "negative", provider=cached and cached['provider'])
+            return cached_lyrics(cached)
+    try:
+        return await search_and_store(search_variations, remaining)
+    finally:
+        if shared_state is not None:
+            submit_shared(release_search_lease, search_key)
+
+def release_search_lease(search_key):
+    """Libère le bail de recherche une fois le résultat écrit dans le cache partagé"""
+    lyrics_cache.flush()
+    shared_state.release_lease(f"search|{search_key}")
+
+async def wait_for_peer_search(search_key):
+    """Prend le bail de recherche de `search_key`, ou attend que le worker qui le tient ait rempli le cache.
+
+    Retourne l'entrée de cache partagée (MISSING si c'est à ce worker de chercher).
+    """
+    while not await run_shared(shared_state.acquire_lease, f"search|{search_key}", REQUEST_BUDGET):
+        count("peer_search_wait")
+        await asyncio.sleep(PEER_SEARCH_POLL)
+        cached = lyrics_cache.get(search_key)
+        if cached is not MISSING:
+            return cached
+    return MISSING
+
+async def search_and_store(search_variations, remaining, refresh=False):
+    """Interroge les fournisseurs pour les variations restantes et met le résultat en cache.
+
+    En rafraîchissement, un échec ne remplace pas les paroles déjà en cache.
+    """
+    search = search_lyrics_sequential if SEARCH_MODE == "sequential" else search_lyrics_race
+    outcome = {"inconclusive": False, "missed": set(), "cancelled": set()}
+    token = _search_outcome.set(outcome)
+    try:
+        with request_budget(), timed("search", mode=SEARCH_MODE):
+            result = await asyncio.wait_for(search(remaining), remaining_budget())
+    except asyncio.TimeoutError:
+        count("budget_exhausted", stage="search")
+        logger.warning("⏱️ Budget de latence de la requête épuisé")
+        emit_progress("budget", status="exhausted")
+        return None
+    finally:
+        _search_outcome.reset(token)
+    
+    if result:
+        lyrics, provider, variation = result
+        entry = cache_entry(lyrics, provider)
+        # La première variation cherchée sert aussi de clé aux workers qui attendent ce résultat
+        for key in {normalize_key(*variation), normalize_key(*search_variations[0]), normalize_key(*remaining[0])}:
+            lyrics_cache.set(key, entry, LYRICS_TTL + STALE_TTL)
+        # Les variations planifiées avant la gagnante n'ont échoué que si leurs tentatives ont abouti
+        # (une tentative encore en cours, annulée en fin de course, ne dit rien de la variation)
+        for tried in remaining[:remaining.index(variation)]:
+            if tried in outcome["missed"] and tried not in outcome["cancelled"]:
+                record_outcome(tried, False)
+        record_outcome(variation, True)
+        await run_blocking(lyrics_index.add, *variation, lyrics, provider)
+        return lyrics
+    
+    # Un échec dû à un timeout n'est pas mis en cache : le fournisseur pourrait répondre plus tard
+    if not outcome["inconclusive"] and not refresh:
+        for variation in remaining:
+            lyrics_cache.set(normalize_key(*variation), None, NEGATIVE_TTL)
+            record_outcome(variation, False)
+    return None
+
+async def get_video_info_cached(youtube_url):
+    """Version asynchrone et mise en cache (par identifiant vidéo) de get_video_info_youtube"""
+    video_id = extract_video_id(youtube_url)
+    video_refresher.track(video_id, youtube_url)
+    cached = video_cache.get(video_id)
+    if cached is not MISSING and is_stale(cached[3] if len(cached) > 3 else None, VIDEO_TTL):
+        cached = video_cache.reload(video_id)
+        if cached is not MISSING and is_stale(cached[3] if len(cached) > 3 else None, VIDEO_TTL):
+            count("cache", cache="video", result="stale")
+            video_refresher.schedule(video_id, youtube_url)
+    count("cache", cache="video", result="miss" if cached is MISSING else "hit")
+    if cached is not MISSING:
+        return tuple(cached[:3])
+    
+    return await fetch_video_info(video_id, youtube_url)
+
+async def fetch_video_info(video_id, youtube_url):
+    """Métadonnées de la vidéo (oEmbed puis yt-dlp), mises en cache"""
+    oembed_info = await fetch_oembed_info(youtube_url) if METADATA_MODE == "oembed" else None
+    if oembed_info:
+        youtube_title, uploader, thumbnail = oembed_info
+        artist, title = parse_artist_and_title(youtube_title, uploader)
+    else:
+        title, artist, thumbnail = await run_probe(get_video_info_youtube, youtube_url)
+    
+    if title != "Unknown Title":
+        video_cache.set(video_id, [title, artist, thumbnail, time.time()], VIDEO_TTL + STALE_TTL)
+    return title, artist, thumbnail
+
+async def refresh_video(video_id, youtube_url):
+    title, _, _ = await fetch_video_info(video_id, youtube_url)
+    return title != "Unknown Title"
+
+def video_due(video_id, youtube_url):
+    cached = video_cache.get(video_id)
+    return cached is not MISSING and needs_refresh(cached[3] if len(cached) > 3 else 0, VIDEO_TTL)
+
+async def refresh_song(song_key, variations):
+    """Relance la recherche d'une chanson populaire (les paroles en cache restent servies en attendant)"""
+    variations = [Variation(*variation) for variation in variations]
+    return bool(await search_and_store(variations, variations, refresh=True))
+
+def song_due(song_key, variations):
+    cached = lyrics_cache.get(song_key)
+    # Entrée complètement expirée : la chanson populaire est rechargée aussi
+    return cached is MISSING or bool(cached) and needs_refresh(cached.get('fetched_at', 0), LYRICS_TTL)
+
+# Entrées populaires rafraîchies avant expiration (et entrées périmées servies pendant leur rafraîchissement)
+song_refresher = Refresher("lyrics", refresh_song, song_due)
+video_refresher = Refresher("video", refresh_video, video_due)
+
+async def search_lyrics_cli(search_variations):
+    """Cherche les paroles en mode console puis ferme le client HTTP"""
+    try:
+        return await find_lyrics(search_variations)
+    finally:
+        await close_pools()
 
 def main():
     print("🎵 RÉCUPÉRATEUR DE PAROLES YOUTUBE 🎵")
@@ -638,98 +1071,10 @@ def main():
     
     print(f"🔍 Recherche pour : {artist} - {clean_title_for_search}")
     
-    lyrics = None
-    
-    # Try multiple search variations with improved logic
-    search_variations = [
-        (artist, clean_title_for_search),
-    ]
+    # Variations de recherche, sans doublons, dans l'ordre le plus prometteur
+    search_variations = plan_variations(create_search_variations(clean_title_for_search, artist, original_title=title))
     
-    # Special handling for covers/remixes - try original song info
-    original_song_match = re.search(r'([^"]+)\s*["\']([^"\'\.]+)["\']', title)
-    if original_song_match:
-        potential_original_artist = original_song_match.group(1).strip()
-        potential_original_title = original_song_match.group(2).strip()
-        print(f"🎵 Détection possible de cover/remix: {potential_original_artist} - {potential_original_title}")
-        # Try the original song first, then the cover artist version
-        search_variations.insert(0, (potential_original_artist, potential_original_title))
-        search_variations.append((artist, potential_original_title))
-    
-    # Add variations for collaborations
-    if ',' in artist:
-        artists = [a.strip() for a in artist.split(',')]
-        # Try with just the first artist
-        search_variations.append((artists[0], clean_title_for_search))
-        # Try with "feat" format if more than one artist
-        if len(artists) > 1:
-            search_variations.append((f"{artists[0]} feat {artists[1]}", clean_title_for_search))
-    
-    # Handle "feat", "ft", "featuring" in artist name
-    if any(word in artist.lower() for word in ['feat', 'ft.', 'featuring']):
-        # Extract main artist before "feat"/"ft"/"featuring"
-        main_artist = re.split(r'\s+(?:feat\.?|ft\.?|featuring)\s+', artist, flags=re.IGNORECASE)[0].strip()
-        search_variations.append((main_artist, clean_title_for_search))
-    
-    # Add variations with simplified titles
-    simple_title = re.sub(r'\[.*?\]|\(.*?\)', '', clean_title_for_search).strip()
-    if simple_title != clean_title_for_search and simple_title:
-        search_variations.append((artist, simple_title))
-    
-    # Try removing common words from title
-    title_clean = re.sub(r'\b(?:remix|mix|version|edit|remaster|remastered|cover)\b', '', clean_title_for_search, flags=re.IGNORECASE).strip()
-    if title_clean != clean_title_for_search and title_clean:
-        search_variations.append((artist, title_clean))
-    
-    # For complex titles, try extracting key phrases
-    if 'still' in clean_title_for_search.lower() and 'dre' in clean_title_for_search.lower():
-        search_variations.append(("Dr. Dre", "Still D.R.E."))
-        search_variations.append((artist, "Still D.R.E."))
-    
-    # Try just the first few words of the title if it's long
-    title_words = clean_title_for_search.split()
-    if len(title_words) > 3:
-        short_title = ' '.join(title_words[:3])
-        search_variations.append((artist, short_title))
-    elif len(title_words) > 1:
-        search_variations.append((artist, title_words[0]))
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_variations = []
-    for variation in search_variations:
-        if variation not in seen and variation[0] and variation[1]:  # Ensure both artist and title exist
-            seen.add(variation)
-            unique_variations.append(variation)
-    search_variations = unique_variations[:8]  # Increase to 8 variations max
-    
-    for i, (search_artist, search_title) in enumerate(search_variations):
-        if lyrics:
-            break
-            
-        print(f"\n🎯 Variation de recherche {i+1}: {search_artist} - {search_title}")
-        
-        # Méthode 1: Lyrics.ovh (API gratuite)
-        print("\n🔄 Tentative 1/4: Lyrics.ovh")
-        lyrics = get_lyrics_ovh(search_artist, search_title)
-        
-        # Méthode 2: Musixmatch scraping
-        if not lyrics:
-            print("\n🔄 Tentative 2/4: Musixmatch")
-            lyrics = get_lyrics_musixmatch_search(search_artist, search_title)
-        
-        # Méthode 3: AZLyrics
-        if not lyrics:
-            print("\n🔄 Tentative 3/4: AZLyrics")
-            lyrics = get_lyrics_azlyrics(search_artist, search_title)
-        
-        # Méthode 4: Recherche Google
-        if not lyrics:
-            print("\n🔄 Tentative 4/4: Recherche Google")
-            lyrics = search_google_lyrics(search_artist, search_title)
-        
-        # If found lyrics, break the loop
-        if lyrics:
-            break
+    lyrics = asyncio.run(search_lyrics_cli(search_variations))
     
     # Afficher le résultat
     print("\n" + "="*50)
@@ -746,102 +1091,362 @@ def main():
         print("   - Essayez avec une autre vidéo de la même chanson")
         print("   - Cette chanson pourrait ne pas avoir de paroles disponibles en ligne")
 
+async def extract_from_youtube(youtube_url):
+    """Pipeline complet pour une URL : métadonnées, variations, paroles (dans le budget de latence)"""
+    with request_budget():
+        return await _extract_from_youtube(youtube_url)
+
+async def _extract_from_youtube(youtube_url):
+    # Extraire le titre et l'artiste depuis YouTube (oEmbed puis yt-dlp, dans le budget)
+    try:
+        title, artist, thumbnail = await asyncio.wait_for(get_video_info_cached(youtube_url), remaining_budget())
+    except asyncio.TimeoutError:
+        count("budget_exhausted", stage="metadata")
+        logger.warning("⏱️ Budget de latence épuisé pendant la récupération des métadonnées")
+        emit_progress("budget", status="exhausted")
+        return LyricsResponse(
+            status="error",
+            lyrics="Impossible d'extraire les informations de la vidéo (délai dépassé)",
+            metadata={"title": "", "artist": ""}
+        )
+    
+    if not title:
+        return LyricsResponse(
+            status="error",
+            lyrics="Impossible d'extraire les informations de la vidéo",
+            metadata={"title": "", "artist": ""}
+        )
+    
+    # Nettoyer le titre
+    clean_song_title = clean_title(title)
+    logger.info(f"🎵 Titre original: {title}")
+    logger.info(f"🎵 Titre nettoyé: {clean_song_title}")
+    logger.info(f"🎤 Artiste: {artist}")
+    emit_progress("metadata", title=clean_song_title, artist=artist, thumbnail=thumbnail)
+    
+    # Créer les variations de recherche, sans doublons, dans l'ordre le plus prometteur
+    search_variations = plan_variations(create_search_variations(clean_song_title, artist, original_title=title))
+    
+    lyrics = await find_lyrics(search_variations)
+    
+    if lyrics and lyrics.strip():
+        return LyricsResponse(
+            status="success",
+            lyrics=lyrics,
+            metadata={
+                "title": clean_song_title,
+                "artist": artist,
+                "thumbnail": thumbnail
+            }
+        )
+    else:
+        return LyricsResponse(
+            status="error",
+            lyrics="Aucune parole trouvée pour cette chanson",
+            metadata={
+                "title": clean_song_title,
+                "artist": artist,
+                "thumbnail": thumbnail
+            }
+        )
+
+def is_youtube_url(youtube_url):
+    return bool(youtube_url) and ("youtube.com" in youtube_url or "youtu.be" in youtube_url)
+
+async def extract_coalesced(youtube_url):
+    """Extraction partagée entre les requêtes simultanées pour la même vidéo"""
+    return await extract_flight.do(
+        extract_video_id(youtube_url),
+        lambda: extract_from_youtube(youtube_url)
+    )
+
+def lyrics_json_response(result, http_request):
+    """Réponse JSON d'une extraction : format compact sur demande (?format=compact),
+    ETag sur les succès et 304 si le client a déjà cette version (If-None-Match)"""
+    payload = result.model_dump(exclude_none=True)
+    if result.status != "success":
+        return JSONResponse(payload)
+    if http_request.query_params.get("format") == "compact":
+        payload = CompactLyricsResponse(
+            status=result.status, metadata=result.metadata, **compact_lyrics(result.lyrics)
+        ).model_dump(exclude_none=True)
+    etag = payload_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(etag, http_request.headers.get("if-none-match")):
+        count("not_modified")
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
 # Endpoint API pour extraire les paroles
-@app.post("/api/extract", response_model=LyricsResponse)
-async def extract_lyrics(request: ExtractRequest):
+@app.post("/api/extract", response_model=LyricsResponse, response_model_exclude_none=True,
+          responses={200: {"model": CompactLyricsResponse}, 304: {}})
+async def extract_lyrics(request: ExtractRequest, http_request: Request):
     try:
         youtube_url = request.youtube_url
         
-        if not youtube_url or "youtube.com" not in youtube_url and "youtu.be" not in youtube_url:
+        if not is_youtube_url(youtube_url):
             return LyricsResponse(
                 status="error",
                 lyrics="URL YouTube invalide",
                 metadata={"title": "", "artist": ""}
             )
         
-        # Extraire le titre et l'artiste depuis YouTube
-        title, artist, thumbnail = get_video_info_youtube(youtube_url)
-        
-        if not title:
-            return LyricsResponse(
-                status="error",
-                lyrics="Impossible d'extraire les informations de la vidéo",
-                metadata={"title": "", "artist": ""}
-            )
-        
-        # Nettoyer le titre
-        clean_song_title = clean_title(title)
-        print(f"\n🎵 Titre original: {title}")
-        print(f"🎵 Titre nettoyé: {clean_song_title}")
-        print(f"🎤 Artiste: {artist}")
-        
-        # Créer les variations de recherche
-        variations = create_search_variations(clean_song_title, artist)
-        
-        # Éliminer les doublons
-        seen = set()
-        unique_variations = []
-        for variation in variations:
-            variation_key = f"{variation[0].lower()} - {variation[1].lower()}"
-            if variation_key not in seen:
-                seen.add(variation)
-                unique_variations.append(variation)
-        search_variations = unique_variations[:8]
-        
-        lyrics = ""
-        for i, (search_artist, search_title) in enumerate(search_variations):
-            if lyrics:
-                break
-                
-            print(f"\n🎯 Variation de recherche {i+1}: {search_artist} - {search_title}")
-            
-            # Méthode 1: Lyrics.ovh
-            lyrics = get_lyrics_ovh(search_artist, search_title)
-            
-            # Méthode 2: Musixmatch scraping
-            if not lyrics:
-                lyrics = get_lyrics_musixmatch_search(search_artist, search_title)
-            
-            # Méthode 3: AZLyrics
-            if not lyrics:
-                lyrics = get_lyrics_azlyrics(search_artist, search_title)
-            
-            # Méthode 4: Recherche Google
-            if not lyrics:
-                lyrics = search_google_lyrics(search_artist, search_title)
-            
-            if lyrics:
-                break
-        
-        if lyrics and lyrics.strip():
-            return LyricsResponse(
-                status="success",
-                lyrics=lyrics,
-                metadata={
-                    "title": clean_song_title,
-                    "artist": artist,
-                    "thumbnail": thumbnail
-                }
-            )
-        else:
-            return LyricsResponse(
-                status="error",
-                lyrics="Aucune parole trouvée pour cette chanson",
-                metadata={
-                    "title": clean_song_title,
-                    "artist": artist,
-                    "thumbnail": thumbnail
-                }
-            )
+        # Les requêtes simultanées pour la même vidéo partagent une seule extraction
+        return lyrics_json_response(await extract_coalesced(youtube_url), http_request)
             
     except Exception as e:
-        print(f"Erreur lors de l'extraction: {str(e)}")
+        logger.error(f"Erreur lors de l'extraction: {str(e)}")
         return LyricsResponse(
             status="error",
             lyrics=f"Erreur: {str(e)}",
             metadata={"title": "", "artist": ""}
         )
 
+# Intervalle (secondes) des événements "ping" qui gardent la connexion ouverte
+STREAM_HEARTBEAT = float(os.environ.get("LYRICS_STREAM_HEARTBEAT", "10"))
+
+def encode_stream_event(event, sse):
+    data = json.dumps(event, ensure_ascii=False)
+    if sse:
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+# Endpoint API en streaming : métadonnées, tentatives puis paroles (NDJSON ou SSE)
+@app.post("/api/extract/stream")
+async def extract_lyrics_stream(request: ExtractRequest, http_request: Request):
+    youtube_url = request.youtube_url
+    sse = (http_request.query_params.get("format") == "sse"
+           or "text/event-stream" in http_request.headers.get("accept", ""))
+    queue = asyncio.Queue()
+    
+    async def run_extraction():
+        _progress_queue.set(queue)
+        if not is_youtube_url(youtube_url):
+            result = LyricsResponse(status="error", lyrics="URL YouTube invalide", metadata={"title": "", "artist": ""})
+        else:
+            try:
+                # Pas de regroupement par vidéo ici : chaque client reçoit ses propres événements
+                result = await extract_from_youtube(youtube_url)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'extraction: {str(e)}")
+                result = LyricsResponse(status="error", lyrics=f"Erreur: {str(e)}", metadata={"title": "", "artist": ""})
+        queue.put_nowait({"event": "result", **result.model_dump()})
+    
+    async def events():
+        task = asyncio.create_task(run_extraction())
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    event = {"event": "ping"}
+                yield encode_stream_event(event, sse)
+                if event["event"] == "result":
+                    break
+        finally:
+            task.cancel()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def run_extract_job(youtube_url):
+    """Exécute un job d'extraction (appelé par les workers de la file), dans sa propre trace"""
+    with trace("job /api/extract"):
+        if not is_youtube_url(youtube_url):
+            result = LyricsResponse(status="error", lyrics="URL YouTube invalide", metadata={"title": "", "artist": ""})
+        else:
+            result = await extract_coalesced(youtube_url)
+    return result.model_dump()
+
+# File de jobs : l'admission des requêtes est découplée de la durée des recherches
+extract_jobs = JobQueue(run_extract_job)
+
+def job_response(job):
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        position=extract_jobs.position(job),
+        result=job.result,
+        error=job.error
+    )
+
+# Endpoint API asynchrone : met l'extraction en file et retourne un identifiant de job
+@app.post("/api/extract/jobs", response_model=JobResponse, status_code=202)
+async def submit_extract_job(request: JobRequest):
+    try:
+        job = await extract_jobs.submit(request.youtube_url, priority=min(max(request.priority, 0), 9))
+    except QueueFullError as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "30"})
+    return job_response(job)
+
+# Statut et résultat d'un job
+@app.get("/api/extract/jobs/{job_id}", response_model=JobResponse)
+async def get_extract_job(job_id: str):
+    job = await extract_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": "Job inconnu ou expiré"})
+    return job_response(job)
+
+async def playlist_video_urls(playlist_url):
+    """URLs des vidéos d'une playlist ; leurs métadonnées sont mises en cache au passage"""
+    urls = []
+    for url, youtube_title, uploader, thumbnail in await run_blocking(expand_playlist, playlist_url):
+        urls.append(url)
+        # L'extraction flat donne déjà titre et chaîne : inutile de re-sonder la vidéo
+        video_id = extract_video_id(url)
+        if youtube_title and uploader and video_cache.get(video_id) is MISSING:
+            artist, title = parse_artist_and_title(youtube_title, uploader)
+            video_cache.set(video_id, [title, artist, thumbnail, time.time()], VIDEO_TTL + STALE_TTL)
+    return urls
+
+# Vidéos ou playlists (classements...) dont les paroles sont chargées en cache au démarrage
+WARMUP_URLS = [url.strip() for url in os.environ.get("LYRICS_WARMUP_URLS", "").split(",") if url.strip()]
+# Fichier d'URLs à préchauffer, une par ligne (# pour les commentaires)
+WARMUP_FILE = os.environ.get("LYRICS_WARMUP_FILE", "")
+WARMUP_CONCURRENCY = int(os.environ.get("LYRICS_WARMUP_CONCURRENCY", "2"))
+
+def warmup_urls():
+    urls = list(WARMUP_URLS)
+    if WARMUP_FILE:
+        try:
+            with open(WARMUP_FILE, encoding="utf-8") as f:
+                urls.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+        except OSError as e:
+            logger.warning(f"⚠️ Liste de préchauffage illisible ({WARMUP_FILE}): {e}")
+    return urls
+
+async def warm_up(urls):
+    """Extrait en arrière-plan les paroles d'une liste de vidéos et de playlists"""
+    # Multi-processus : un seul worker préchauffe, les autres profitent du cache partagé
+    if shared_state is not None and not await run_shared(shared_state.acquire_lease, "warmup", REFRESH_INTERVAL):
+        return
+    video_urls = []
+    for url in urls:
+        if 'list=' in url:
+            try:
+                video_urls.extend(await playlist_video_urls(url))
+            except Exception as e:
+                logger.warning(f"⚠️ Playlist de préchauffage illisible ({url}): {e}")
+        elif is_youtube_url(url):
+            video_urls.append(url)
+    
+    semaphore = asyncio.Semaphore(WARMUP_CONCURRENCY)
+    
+    async def warm(youtube_url):
+        async with semaphore:
+            try:
+                return (await extract_coalesced(youtube_url)).status == "success"
+            except Exception as e:
+                logger.warning(f"⚠️ Préchauffage en échec pour {youtube_url}: {e}")
+                return False
+    
+    start = time.monotonic()
+    results = await asyncio.gather(*(warm(url) for url in dict.fromkeys(video_urls)))
+    logger.info(f"🔥 Préchauffage terminé: {sum(results)}/{len(results)} chansons en cache "
+                f"en {time.monotonic() - start:.0f}s")
+
+# Endpoint API pour extraire les paroles d'une liste d'URLs ou d'une playlist
+@app.post("/api/extract/batch", response_model=BatchLyricsResponse)
+async def extract_lyrics_batch(request: BatchExtractRequest):
+    youtube_urls = list(request.youtube_urls)
+    playlist_error = None
+    
+    if request.playlist_url:
+        try:
+            youtube_urls.extend(await playlist_video_urls(request.playlist_url))
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la lecture de la playlist: {e}")
+            # Les URL explicites du lot sont tout de même traitées
+            playlist_error = BatchItem(youtube_url=request.playlist_url, status="error",
+                                       metadata={"title": "", "artist": ""},
+                                       lyrics=f"Playlist illisible : {str(e)}")
+    
+    # Une seule extraction par vidéo, même si elle apparaît plusieurs fois
+    unique_urls = {}
+    for youtube_url in youtube_urls[:BATCH_MAX_ITEMS]:
+        unique_urls.setdefault(extract_video_id(youtube_url), youtube_url)
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def extract_item(youtube_url):
+        if not is_youtube_url(youtube_url):
+            result = LyricsResponse(status="error", lyrics="URL YouTube invalide", metadata={"title": "", "artist": ""})
+        else:
+            try:
+                async with semaphore:
+                    result = await extract_coalesced(youtube_url)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'extraction de {youtube_url}: {e}")
+                result = LyricsResponse(status="error", lyrics=f"Erreur: {str(e)}", metadata={"title": "", "artist": ""})
+        return BatchItem(youtube_url=youtube_url, **result.model_dump())
+    
+    results = await asyncio.gather(*[extract_item(url) for url in unique_urls.values()])
+    by_video = {extract_video_id(item.youtube_url): item for item in results}
+    items = [
+        by_video[extract_video_id(url)].model_copy(update={"youtube_url": url})
+        for url in youtube_urls[:BATCH_MAX_ITEMS]
+    ]
+    # Au-delà de la taille maximale d'un lot : une erreur explicite par URL non traitée
+    items += [
+        BatchItem(youtube_url=url, status="error", metadata={"title": "", "artist": ""},
+                  lyrics=f"Lot limité à {BATCH_MAX_ITEMS} vidéos : URL non traitée")
+        for url in youtube_urls[BATCH_MAX_ITEMS:]
+    ]
+    if playlist_error is not None:
+        items.append(playlist_error)
+    
+    status = "success" if any(item.status == "success" for item in items) else "error"
+    return BatchLyricsResponse(status=status, items=items)
+
+# Statistiques des pools de connexions HTTP
+@app.get("/api/stats/pools")
+async def get_pool_stats():
+    return pool_stats()
+
+# État des disjoncteurs et santé des fournisseurs
+@app.get("/api/stats/providers")
+async def get_provider_stats():
+    return dict(
+        health_stats(),
+        singleflight={flight.name: flight.snapshot() for flight in (extract_flight, provider_flight)},
+        jobs=extract_jobs.stats(),
+        providers_config=provider_stats(),
+        planner=planner_stats(),
+        index=lyrics_index.snapshot(),
+        store=lyrics_store.snapshot(),
+        shared_state=shared_state.snapshot() if shared_state else None,
+        refresh={refresher.name: refresher.snapshot() for refresher in (song_refresher, video_refresher)}
+    )
+
+def cache_gauges():
+    gauges = []
+    for name, cache in (("video", video_cache), ("lyrics", lyrics_cache), ("serp", serp_cache)):
+        gauges.append(("lyrics_cache_hits_total", {"cache": name}, cache.hits))
+        gauges.append(("lyrics_cache_misses_total", {"cache": name}, cache.misses))
+    for flight in (extract_flight, provider_flight):
+        gauges.append(("lyrics_singleflight_in_flight", {"flight": flight.name}, flight.in_flight()))
+    for status, value in extract_jobs.stats().items():
+        if status in ('queued', 'running'):
+            gauges.append(("lyrics_jobs", {"status": status}, value))
+    for name, provider in PROVIDERS.items():
+        gauges.append(("lyrics_provider_in_flight", {"provider": name}, provider.snapshot()['in_flight']))
+    return gauges
+
+register_gauges(cache_gauges)
+
+# Métriques au format Prometheus
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+# Traces des dernières requêtes (spans par étape)
+@app.get("/api/stats/traces")
+async def get_traces(limit: int = 20):
+    return recent_traces(limit)
+
 # Endpoint pour tester l'API
 @app.get("/")
 async def root():
@@ -857,5 +1462,13 @@ if __name__ == "__main__":
         sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
         sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
     
-    print("Demarrage du serveur API sur http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    logger.info("Demarrage du serveur API sur http://localhost:8000")
+    # Serveur de longue durée : dépendances préchargées par défaut (hérité par les workers)
+    os.environ.setdefault("LYRICS_PRELOAD", "1")
+    PRELOAD = os.environ["LYRICS_PRELOAD"] == "1"
+    if WORKERS > 1:
+        # Plusieurs processus (le parsing HTML est limité par le GIL) ; uvicorn les importe via "you:app"
+        logger.info(f"{WORKERS} workers, état partagé: {shared_state.path if shared_state else 'désactivé'}")
+        uvicorn.run("you:app", host="0.0.0.0", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,15 +1,5 @@
 import { Component } from '@angular/core';
-import { LyricsService } from '../services/lyrics.service';
-
-interface LyricsResponse {
-  status: string;
-  lyrics: string;
-  metadata: {
-    title: string;
-    artist: string;
-    thumbnail?: string;
-  };
-}
+import { LyricsService, LyricsStreamEvent } from '../services/lyrics.service';
 
 @Component({
   selector: 'app-pageprincipale',
@@ -32,17 +22,27 @@ export class PageprincipaleComponent {
     
     this.isLoading = true;
     this.errorMessage = '';
+    this.lyrics = '';
+    this.songInfo = null;
     
-    this.lyricsService.getLyrics(this.youtubeUrl).subscribe({
-      next: (response: LyricsResponse) => {
-        this.lyrics = response.lyrics;
-        this.songInfo = response.metadata;
-        this.isLoading = false;
+    this.lyricsService.streamLyrics(this.youtubeUrl).subscribe({
+      next: (event: LyricsStreamEvent) => {
+        if (event.event === 'metadata') {
+          // Afficher le titre et la miniature avant la fin de la recherche
+          this.songInfo = { title: event.title, artist: event.artist, thumbnail: event.thumbnail };
+        } else if (event.event === 'result') {
+          this.lyrics = event.lyrics;
+          this.songInfo = event.metadata;
+          this.isLoading = false;
+        }
       },
       error: (err: any) => {
         this.errorMessage = 'Failed to get lyrics. Please try another song.';
         this.isLoading = false;
         console.error(err);
+      },
+      complete: () => {
+        this.isLoading = false;
       }
     });
   }
@@ -1,8 +1,8 @@
-import { Injectable } from '@angular/core';
+import { Injectable, NgZone } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
 
-interface LyricsResponse {
+export interface LyricsResponse {
   status: string;
   lyrics: string;
   metadata: {
@@ -12,15 +12,66 @@ interface LyricsResponse {
   };
 }
 
+export type LyricsStreamEvent =
+  | { event: 'metadata'; title: string; artist: string; thumbnail?: string }
+  | { event: 'attempt'; status: string; provider: string; artist: string; title: string }
+  | { event: 'cache'; status: string; provider?: string; artist?: string; title?: string }
+  | { event: 'ping' }
+  | ({ event: 'result' } & LyricsResponse);
+
 @Injectable({
   providedIn: 'root'
 })
 export class LyricsService {
   private apiUrl = 'https://lyrics-s7ko.onrender.com/api/extract';
 
-  constructor(private http: HttpClient) { }
+  constructor(private http: HttpClient, private zone: NgZone) { }
 
   getLyrics(youtubeUrl: string): Observable<LyricsResponse> {
     return this.http.post<LyricsResponse>(this.apiUrl, { youtube_url: youtubeUrl });
   }
-}
\ No newline at end of file
+
+  // Streaming NDJSON : les métadonnées arrivent avant les paroles
+  streamLyrics(youtubeUrl: string): Observable<LyricsStreamEvent> {
+    return new Observable<LyricsStreamEvent>(subscriber => {
+      const controller = new AbortController();
+
+      fetch(`${this.apiUrl}/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Accept': 'application/x-ndjson' },
+        body: JSON.stringify({ youtube_url: youtubeUrl }),
+        signal: controller.signal
+      }).then(async response => {
+        if (!response.ok || !response.body) {
+          throw new Error(`HTTP ${response.status}`);
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) {
+            break;
+          }
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split('\n');
+          buffer = lines.pop() ?? '';
+          for (const line of lines) {
+            if (line.trim()) {
+              const event = JSON.parse(line) as LyricsStreamEvent;
+              this.zone.run(() => subscriber.next(event));
+            }
+          }
+        }
+        this.zone.run(() => subscriber.complete());
+      }).catch(err => {
+        if (!controller.signal.aborted) {
+          this.zone.run(() => subscriber.error(err));
+        }
+      });
+
+      return () => controller.abort();
+    });
+  }
+}